@@ -1,15 +1,25 @@
+import functools
+import os
+import re
 import sqlite3
+import threading
+import time
+import uuid
 from datetime import date, datetime, timedelta
 from io import StringIO, BytesIO
-from typing import Optional, Dict, List, Tuple
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Iterator
 import calendar
+import csv
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import xlsxwriter
 
 # -------------------- Config & Estilo --------------------
 st.set_page_config(
@@ -29,7 +39,7 @@ st.markdown(
     --warning-color: #ff7f0e;
     --error-color: #d62728;
 }
-.block-container {padding-top: var(--top-pad);}
+.block-container {padding-top: var(--top-pad);} 
 [data-testid="stMetricValue"] {font-weight: 700; font-size: 1.5rem;}
 [data-testid="stMetricDelta"] {font-size: 1rem;}
 div[data-testid="stDataFrame"] div[role="grid"] {font-size: 0.9rem;}
@@ -53,7 +63,11 @@ h1, h2, h3 { margin-top: 0.5rem; margin-bottom: 0.8rem; }
 # -------------------- Constantes --------------------
 DB_PATH = "fluxo_pro.db"
 LANC_COLUMNS = ["id", "data", "empresa", "descricao", "categoria", "tipo", "valor", "observacoes", "created_at", "updated_at"]
+ANALISE_COLUMNS = ["data", "empresa", "categoria", "tipo", "valor"]
 TIPOS = ["Entrada", "Saída"]
+TIPO_DTYPE = pd.CategoricalDtype(TIPOS)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+CENTAVOS = 100
 CATEGORIAS_ENTRADA = [
     "Vendas", "Serviços", "Juros Recebidos", "Aluguéis Recebidos", 
     "Dividendos", "Outras Receitas", "Transferência Entre Contas"
@@ -63,33 +77,148 @@ CATEGORIAS_SAIDA = [
     "Marketing", "Manutenção", "Combustível", "Alimentação", 
     "Outras Despesas", "Transferência Entre Contas"
 ]
+LANC_POR_PAGINA = 50
 EMPRESAS_PADRAO = [
     "Gestão", "Gestão Fundo de Propaganda", "Effexus", 
     "Effexus - utilizado para gestão", "Indústria", "Adriana"
 ]
+
 # -------------------- Classes de Dados --------------------
 class LancamentoManager:
+    PRAGMAS = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+    ]
+    
+    SCHEMA_LANCAMENTOS = """
+        CREATE TABLE IF NOT EXISTS lancamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data INTEGER NOT NULL,
+            empresa TEXT NOT NULL,
+            descricao TEXT,
+            categoria TEXT,
+            tipo TEXT NOT NULL,
+            valor INTEGER NOT NULL,
+            observacoes TEXT,
+            created_at INTEGER,
+            updated_at INTEGER
+        )
+    """
+    # Resumo mensal mantido por triggers: data guarda o primeiro dia do mês
+    # (mesma codificação de lancamentos.data), valor a soma em centavos e n a contagem.
+    SCHEMA_LANC_MONTHLY = """
+        CREATE TABLE IF NOT EXISTS lanc_monthly (
+            data INTEGER NOT NULL,
+            empresa TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            valor INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (data, empresa, categoria, tipo)
+        ) WITHOUT ROWID
+    """
+    INICIO_MES_SQL = "CAST(julianday(date({col} + 2440587.5, 'start of month')) - 2440587.5 AS INTEGER)"
+    SOMAR_MENSAL_SQL = f"""
+        INSERT INTO lanc_monthly (data, empresa, categoria, tipo, valor, n)
+        VALUES ({INICIO_MES_SQL.format(col="NEW.data")}, NEW.empresa, COALESCE(NEW.categoria, ''), NEW.tipo, NEW.valor, 1)
+        ON CONFLICT (data, empresa, categoria, tipo) DO UPDATE SET valor = valor + excluded.valor, n = n + 1;
+    """
+    CHAVE_MENSAL_OLD_SQL = (
+        f"data = {INICIO_MES_SQL.format(col='OLD.data')} AND empresa = OLD.empresa"
+        " AND categoria = COALESCE(OLD.categoria, '') AND tipo = OLD.tipo"
+    )
+    SUBTRAIR_MENSAL_SQL = f"""
+        UPDATE lanc_monthly SET valor = valor - OLD.valor, n = n - 1 WHERE {CHAVE_MENSAL_OLD_SQL};
+        DELETE FROM lanc_monthly WHERE {CHAVE_MENSAL_OLD_SQL} AND n <= 0;
+    """
+    TRIGGERS_MENSAL = {
+        "trg_lanc_monthly_ins": f"AFTER INSERT ON lancamentos BEGIN {SOMAR_MENSAL_SQL} END",
+        "trg_lanc_monthly_del": f"AFTER DELETE ON lancamentos BEGIN {SUBTRAIR_MENSAL_SQL} END",
+        "trg_lanc_monthly_upd": f"AFTER UPDATE ON lancamentos BEGIN {SUBTRAIR_MENSAL_SQL} {SOMAR_MENSAL_SQL} END",
+    }
+    # Identificador aleatório gerado na criação do banco e contador de escritas:
+    # juntos nomeiam o snapshot Parquet válido para qualquer processo que abra o arquivo.
+    SCHEMA_LANC_VERSAO = """
+        CREATE TABLE IF NOT EXISTS lanc_versao (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            instancia TEXT NOT NULL,
+            versao INTEGER NOT NULL
+        )
+    """
+    VERSAO_SQL = "SELECT instancia, versao FROM lanc_versao"
+    TRIGGERS_VERSAO = {
+        f"trg_lanc_versao_{sufixo}": f"AFTER {evento} ON lancamentos BEGIN UPDATE lanc_versao SET versao = versao + 1; END"
+        for sufixo, evento in (("ins", "INSERT"), ("del", "DELETE"), ("upd", "UPDATE"))
+    }
+    INSERT_SQL = """
+        INSERT INTO lancamentos 
+        (data, empresa, descricao, categoria, tipo, valor, observacoes, created_at, updated_at) 
+        VALUES (?,?,?,?,?,?,?,?,?)
+    """
+    UPDATE_SQL = """
+        UPDATE lancamentos 
+        SET data=?, empresa=?, descricao=?, categoria=?, tipo=?, valor=?, observacoes=?, updated_at=? 
+        WHERE id=?
+    """
+    DELETE_SQL = "DELETE FROM lancamentos WHERE id = ?"
+    # Filtros aceitos, na ordem em que entram na cláusula WHERE.
+    FILTROS_SQL = (
+        ("empresa", "empresa = ?"),
+        ("data_inicio", "data >= ?"),
+        ("data_fim", "data <= ?"),
+        ("tipo", "tipo = ?"),
+    )
+    FILTROS_DATA = {"data_inicio", "data_fim"}
+    # Mesmos filtros, aplicados como predicados na leitura do snapshot Parquet.
+    FILTROS_PARQUET = {
+        "empresa": ("empresa", "=="),
+        "data_inicio": ("data", ">="),
+        "data_fim": ("data", "<="),
+        "tipo": ("tipo", "=="),
+    }
+    # categoria sem valor vira '' (como em lanc_monthly) em todas as leituras.
+    AGRUPAMENTOS = {
+        "empresa": "empresa",
+        "categoria": "COALESCE(categoria, '')",
+        "tipo": "tipo",
+        "mes": "CAST(strftime('%m', data + 2440587.5) AS INTEGER)",
+    }
+    # Timestamps ficam em segundos Unix (UTC) e voltam no horário local na leitura.
+    LEITURA_SQL = {
+        "categoria": "COALESCE(categoria, '') AS categoria",
+        "created_at": "datetime(created_at, 'unixepoch', 'localtime') AS created_at",
+        "updated_at": "datetime(updated_at, 'unixepoch', 'localtime') AS updated_at",
+    }
+    # Conversões aplicadas às colunas que ainda não são INTEGER em bancos antigos.
+    CONVERSOES = {
+        "data": "CAST(julianday(data) - 2440587.5 AS INTEGER)",
+        "valor": "CAST(ROUND(valor * 100) AS INTEGER)",
+        "created_at": "CAST(strftime('%s', created_at, 'utc') AS INTEGER)",
+        "updated_at": "CAST(strftime('%s', updated_at, 'utc') AS INTEGER)",
+    }
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._snapshot_base = os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), ".cache",
+            os.path.splitext(os.path.basename(db_path))[0]
+        )
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            self.conn.execute(pragma)
         self._init_db()
+        self.snapshot_parquet()
     
     def _init_db(self):
         """Inicializa o banco de dados com as tabelas necessárias."""
         conn = self.get_conn()
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS lancamentos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data TEXT NOT NULL,
-                empresa TEXT NOT NULL,
-                descricao TEXT,
-                categoria TEXT,
-                tipo TEXT NOT NULL,
-                valor REAL NOT NULL,
-                observacoes TEXT,
-                created_at TEXT,
-                updated_at TEXT
-            )
-        """)
+        conn.execute(self.SCHEMA_LANCAMENTOS)
+        self._migrar_lancamentos()
         conn.execute("""
             CREATE TABLE IF NOT EXISTS metas (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -100,367 +229,455 @@ class LancamentoManager:
                 created_at TEXT
             )
         """)
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_data ON lancamentos(data)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_empresa ON lancamentos(empresa)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_tipo ON lancamentos(tipo)")
+        # Índices de cobertura: filtros por empresa/período e soma de valor
+        # são resolvidos só pelo índice, sem acessar as linhas da tabela.
+        for idx in ("idx_lanc_data", "idx_lanc_empresa", "idx_lanc_tipo"):
+            conn.execute(f"DROP INDEX IF EXISTS {idx}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_emp_data_tipo ON lancamentos(empresa, data, tipo, valor)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_data_tipo ON lancamentos(data, tipo, valor)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_metas_empresa_mes ON metas(empresa, mes)")
-        conn.close()
+        conn.execute(self.SCHEMA_LANC_MONTHLY)
+        conn.execute(self.SCHEMA_LANC_VERSAO)
+        conn.execute("INSERT OR IGNORE INTO lanc_versao (id, instancia, versao) VALUES (1, ?, 0)", (uuid.uuid4().hex,))
+        # Recriados a cada abertura para que bancos existentes recebam a definição atual.
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for nome, corpo in {**self.TRIGGERS_MENSAL, **self.TRIGGERS_VERSAO}.items():
+                self.conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+                self.conn.execute(f"CREATE TRIGGER {nome} {corpo}")
+        self._normalizar_tipos()
+        self._sincronizar_resumo_mensal()
+        conn.execute("ANALYZE lancamentos")
+        conn.execute("PRAGMA optimize")
     
-    def get_conn(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+    def _migrar_lancamentos(self):
+        """Converte bancos antigos: data em dias desde 1970-01-01, valor em centavos
+        e timestamps em segundos Unix."""
+        tipos = {row[1]: row[2].upper() for row in self.conn.execute("PRAGMA table_info(lancamentos)")}
+        if all(tipos.get(col) == "INTEGER" for col in self.CONVERSOES):
+            return
+        colunas = ", ".join(LANC_COLUMNS)
+        expressoes = ", ".join(
+            f"CASE WHEN typeof({col}) <> 'integer' THEN {self.CONVERSOES[col]} ELSE {col} END"
+            if col in self.CONVERSOES else col
+            for col in LANC_COLUMNS
+        )
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("ALTER TABLE lancamentos RENAME TO lancamentos_old")
+            self.conn.execute(self.SCHEMA_LANCAMENTOS)
+            self.conn.execute(f"INSERT INTO lancamentos ({colunas}) SELECT {expressoes} FROM lancamentos_old")
+            self.conn.execute("DROP TABLE lancamentos_old")
     
-    def insert_lancamento(self, dados: Dict) -> bool:
-        try:
-            conn = self.get_conn()
-            now = datetime.now().isoformat(timespec="seconds")
-            
-            conn.execute("""
-                INSERT INTO lancamentos 
-                (data, empresa, descricao, categoria, tipo, valor, observacoes, created_at, updated_at) 
-                VALUES (?,?,?,?,?,?,?,?,?)
-            """, [
-                dados.get("data"),
-                dados.get("empresa"),
-                dados.get("descricao", ""),
-                dados.get("categoria", ""),
-                dados.get("tipo", "Entrada"),
-                float(dados.get("valor", 0)),
-                dados.get("observacoes", ""),
-                now, now
-            ])
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao inserir lançamento: {e}")
-            return False
+    def _normalizar_tipos(self):
+        """Regrava na forma canônica os tipos salvos com outra caixa ou espaços (bancos antigos)."""
+        with self._lock:
+            tipos = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT tipo FROM lancamentos WHERE tipo NOT IN (?, ?)", TIPOS
+            )]
+        trocas = [(normalizar_tipo(tipo), tipo) for tipo in tipos if normalizar_tipo(tipo) != tipo]
+        if not trocas:
+            return
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("UPDATE lancamentos SET tipo = ? WHERE tipo = ?", trocas)
     
-    def read_lancamentos(self, filtros: Optional[Dict] = None) -> pd.DataFrame:
-        conn = self.get_conn()
-        
-        query = "SELECT * FROM lancamentos"
-        params = []
-        
-        if filtros:
-            conditions = []
-            if filtros.get("empresa"):
-                conditions.append("empresa = ?")
-                params.append(filtros["empresa"])
-            if filtros.get("data_inicio"):
-                conditions.append("data >= ?")
-                params.append(filtros["data_inicio"])
-            if filtros.get("data_fim"):
-                conditions.append("data <= ?")
-                params.append(filtros["data_fim"])
-            if filtros.get("tipo"):
-                conditions.append("tipo = ?")
-                params.append(filtros["tipo"])
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        
-        query += " ORDER BY data DESC, id DESC"
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+    def _sincronizar_resumo_mensal(self):
+        """Reconstrói lanc_monthly se ele não cobre todos os lançamentos (banco novo ou migrado)."""
+        total, resumido = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM lancamentos), (SELECT COALESCE(SUM(n), 0) FROM lanc_monthly)"
+        ).fetchone()
+        if total == resumido:
+            return
+        inicio_mes = self.INICIO_MES_SQL.format(col="data")
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM lanc_monthly")
+            self.conn.execute(
+                "INSERT INTO lanc_monthly (data, empresa, categoria, tipo, valor, n)"
+                f" SELECT {inicio_mes}, empresa, COALESCE(categoria, ''), tipo, SUM(valor), COUNT(*)"
+                " FROM lancamentos GROUP BY 1, 2, 3, 4"
+            )
+    
+    def _apos_escrita(self):
+        """Regrava o snapshot Parquet para a nova versão dos dados e descarta os caches."""
+        self.snapshot_parquet()
+        _invalidar_cache()
+    
+    def _caminho_snapshot(self, instancia: str, versao: int) -> str:
+        return f"{self._snapshot_base}.{instancia}.v{versao}.parquet"
+    
+    def snapshot_parquet(self) -> Optional[str]:
+        """Grava ANALISE_COLUMNS em Parquet (zstd), nomeado pelo banco e pela versão
+        lidos na mesma transação. Chamado na abertura e após cada escrita; não regrava
+        uma versão que já tem snapshot."""
+        with self._snapshot_lock:
+            try:
+                conn = self._conexao_leitura()
+                try:
+                    conn.execute("BEGIN")
+                    caminho = self._caminho_snapshot(*conn.execute(self.VERSAO_SQL).fetchone())
+                    if os.path.exists(caminho):
+                        return caminho
+                    selecao = ", ".join(self.LEITURA_SQL.get(col, col) for col in ANALISE_COLUMNS)
+                    df = pd.read_sql_query(
+                        f"SELECT {selecao} FROM lancamentos ORDER BY data DESC, id DESC", conn
+                    )
+                    conn.execute("COMMIT")
+                finally:
+                    conn.close()
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                temporario = f"{caminho}.{os.getpid()}.tmp"
+                self._tipar(df, ANALISE_COLUMNS).to_parquet(temporario, index=False, compression="zstd")
+                os.replace(temporario, caminho)
+            except (sqlite3.Error, OSError, pa.ArrowException) as e:
+                st.warning(f"Erro ao gravar snapshot Parquet: {e}")
+                return None
+            self._remover_snapshots_antigos(caminho)
+            return caminho
+    
+    def _remover_snapshots_antigos(self, atual: str):
+        """Apaga os snapshots deste arquivo de banco que não são o atual (outras versões ou bancos recriados)."""
+        pasta, prefixo = os.path.split(self._snapshot_base)
+        padrao = re.compile(re.escape(prefixo) + r"\.[0-9a-f]{32}\.v\d+\.parquet")
+        for nome in os.listdir(pasta):
+            caminho = os.path.join(pasta, nome)
+            if caminho != atual and padrao.fullmatch(nome):
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+    
+    def _ler_snapshot(self, filtros: Optional[Dict], colunas: List[str]) -> Optional[pd.DataFrame]:
+        """Lê do snapshot da versão atual só as colunas e linhas pedidas.
         
+        Devolve None quando não há snapshot dessa versão (escrita de outro processo
+        ainda sem snapshot, ou gravação que falhou); a consulta segue no SQLite."""
+        if not set(colunas) <= set(ANALISE_COLUMNS):
+            return None
+        with self._lock:
+            caminho = self._caminho_snapshot(*self.conn.execute(self.VERSAO_SQL).fetchone())
+        predicados = []
+        for chave, valor in (filtros or {}).items():
+            if valor and chave in self.FILTROS_PARQUET:
+                coluna, operador = self.FILTROS_PARQUET[chave]
+                predicados.append((coluna, operador, pd.Timestamp(valor) if chave in self.FILTROS_DATA else valor))
+        try:
+            df = pd.read_parquet(caminho, columns=colunas, filters=predicados or None)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            st.warning(f"Erro ao ler snapshot Parquet, lendo do banco: {e}")
+            return None
         if df.empty:
-            return pd.DataFrame(columns=LANC_COLUMNS)
-        
-        df["valor"] = pd.to_numeric(df["valor"], errors="coerce").fillna(0.0)
+            return pd.DataFrame(columns=colunas)
+        if "data" in df.columns:
+            df["data"] = df["data"].astype("datetime64[s]")
+        if "tipo" in df.columns:
+            df["tipo"] = df["tipo"].astype(TIPO_DTYPE)
+        for col in ("empresa", "categoria"):
+            if col in df.columns:
+                df[col] = df[col].cat.remove_unused_categories()
         return df
     
-    def update_lancamento(self, id_: int, dados: Dict) -> bool:
+    def get_conn(self) -> sqlite3.Connection:
+        return self.conn
+    
+    def _conexao_leitura(self) -> sqlite3.Connection:
+        """Abre uma conexão somente leitura; no modo WAL ela lê em paralelo, sem o lock compartilhado."""
+        uri = Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    
+    def analyze(self):
+        """Atualiza as estatísticas do planejador após cargas em lote."""
+        with self._lock:
+            self.conn.execute("ANALYZE")
+    
+    def insert_lancamento(self, dados: Dict) -> bool:
+        """Insere um novo lançamento."""
         try:
-            conn = self.get_conn()
-            now = datetime.now().isoformat(timespec="seconds")
-            
-            conn.execute("""
-                UPDATE lancamentos 
-                SET data=?, empresa=?, descricao=?, categoria=?, tipo=?, valor=?, observacoes=?, updated_at=? 
-                WHERE id=?
-            """, [
-                dados.get("data"),
-                dados.get("empresa"),
-                dados.get("descricao", ""),
-                dados.get("categoria", ""),
-                dados.get("tipo", "Entrada"),
-                float(dados.get("valor", 0)),
-                dados.get("observacoes", ""),
-                now, int(id_)
-            ])
-            conn.commit()
-            conn.close()
+            now = int(time.time())
+            with self._lock, self.conn:
+                self.conn.execute(self.INSERT_SQL, (
+                    data_para_dias(dados.get("data")),
+                    dados.get("empresa"),
+                    dados.get("descricao", ""),
+                    dados.get("categoria", ""),
+                    normalizar_tipo(dados.get("tipo", "Entrada")),
+                    valor_para_centavos(dados.get("valor", 0)),
+                    dados.get("observacoes", ""),
+                    now, now
+                ))
+            self._apos_escrita()
             return True
         except Exception as e:
-            st.error(f"Erro ao atualizar lançamento: {e}")
+            st.error(f"Erro ao inserir lançamento: {e}")
             return False
     
-    def delete_lancamento(self, id_: int) -> bool:
+    def bulk_insert_lancamentos(self, rows: List[Dict]) -> bool:
+        """Insere vários lançamentos em uma única transação."""
         try:
-            conn = self.get_conn()
-            conn.execute("DELETE FROM lancamentos WHERE id = ?", [int(id_)])
-            conn.commit()
-            conn.close()
+            now = int(time.time())
+            valores = [
+                (
+                    data_para_dias(dados["data"]),
+                    dados["empresa"],
+                    dados.get("descricao", ""),
+                    dados.get("categoria", ""),
+                    normalizar_tipo(dados.get("tipo", "Entrada")),
+                    valor_para_centavos(dados.get("valor", 0)),
+                    dados.get("observacoes", ""),
+                    now, now
+                )
+                for dados in rows
+            ]
+            with self._lock, self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(self.INSERT_SQL, valores)
+            self._apos_escrita()
             return True
         except Exception as e:
-            st.error(f"Erro ao excluir lançamento: {e}")
+            st.error(f"Erro ao inserir lançamentos em lote: {e}")
             return False
-
-class AnalyticsEngine:
-    def __init__(self, manager: LancamentoManager):
-        self.manager = manager
     
-    def calcular_kpis(self, df: pd.DataFrame) -> Dict:
-        """Calcula KPIs principais."""
-        if df.empty:
-            return {"entradas": 0, "saidas": 0, "saldo": 0, "total_lancamentos": 0}
-        
-        df_clean = df.copy()
-        df_clean["tipo_norm"] = df_clean["tipo"].astype(str).str.strip().str.lower()
-        
-        entradas = df_clean.loc[df_clean["tipo_norm"] == "entrada", "valor"].sum()
-        saidas = df_clean.loc[df_clean["tipo_norm"] == "saída", "valor"].sum()
-        saldo = entradas - saidas
-        total_lancamentos = len(df_clean)
-        
-        return {
-            "entradas": float(entradas),
-            "saidas": float(saidas),
-            "saldo": float(saldo),
-            "total_lancamentos": total_lancamentos
-        }
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _where_sql(chaves: frozenset) -> str:
+        """Texto da cláusula WHERE; depende só de quais filtros estão presentes."""
+        conditions = [cond for chave, cond in LancamentoManager.FILTROS_SQL if chave in chaves]
+        if not conditions:
+            return ""
+        return " WHERE " + " AND ".join(conditions)
     
-    def calcular_trends(self, df: pd.DataFrame, periodo: int = 6) -> Dict:
-        """Calcula tendências dos últimos N meses."""
-        if df.empty:
-            return {"trend_entradas": 0, "trend_saidas": 0, "trend_saldo": 0}
-        
-        df_trend = df.copy()
-        df_trend["data_dt"] = pd.to_datetime(df_trend["data"], errors="coerce")
-        df_trend = df_trend.dropna(subset=["data_dt"])
-        
-        # Últimos N meses
-        data_corte = datetime.now() - timedelta(days=periodo * 30)
-        df_trend = df_trend[df_trend["data_dt"] >= data_corte]
-        
-        if df_trend.empty:
-            return {"trend_entradas": 0, "trend_saidas": 0, "trend_saldo": 0}
-        
-        df_trend["mes"] = df_trend["data_dt"].dt.to_period("M")
-        df_trend["tipo_norm"] = df_trend["tipo"].astype(str).str.strip().str.lower()
-        
-        monthly = df_trend.groupby(["mes", "tipo_norm"])["valor"].sum().unstack(fill_value=0)
-        
-        if "entrada" in monthly.columns and len(monthly) >= 2:
-            trend_entradas = monthly["entrada"].pct_change().mean() * 100
-        else:
-            trend_entradas = 0
-        
-        if "saída" in monthly.columns and len(monthly) >= 2:
-            trend_saidas = monthly["saída"].pct_change().mean() * 100
-        else:
-            trend_saidas = 0
-        
-        saldo_mensal = monthly.get("entrada", 0) - monthly.get("saída", 0)
-        if len(saldo_mensal) >= 2:
-            trend_saldo = saldo_mensal.pct_change().mean() * 100
-        else:
-            trend_saldo = 0
-        
+    @classmethod
+    def _where(cls, filtros: Optional[Dict]) -> Tuple[str, List]:
+        """Monta a cláusula WHERE e os parâmetros a partir dos filtros."""
+        ativos = {chave: valor for chave, valor in (filtros or {}).items() if valor}
+        params = [
+            data_para_dias(ativos[chave]) if chave in cls.FILTROS_DATA else ativos[chave]
+            for chave, _ in cls.FILTROS_SQL if chave in ativos
+        ]
+        return cls._where_sql(frozenset(ativos)), params
+    
+    @staticmethod
+    def _origem(filtros: Optional[Dict] = None) -> Tuple[str, str]:
+        """Tabela e expressão de contagem: lanc_monthly quando o período cobre meses inteiros."""
+        filtros = filtros or {}
+        inicio, fim = filtros.get("data_inicio"), filtros.get("data_fim")
+        if inicio and date.fromordinal(data_para_dias(inicio) + EPOCH_ORDINAL).day != 1:
+            return "lancamentos", "COUNT(*)"
+        if fim and date.fromordinal(data_para_dias(fim) + EPOCH_ORDINAL + 1).day != 1:
+            return "lancamentos", "COUNT(*)"
+        return "lanc_monthly", "SUM(n)"
+    
+    def aggregate_kpis(self, filtros: Optional[Dict] = None) -> Dict:
+        """Soma entradas e saídas no SQLite (resultado em cache)."""
+        return _aggregate_kpis_cached(self.db_path, _filtros_key(filtros))
+    
+    def _query_kpis(self, filtros: Optional[Dict] = None) -> Dict:
+        """Soma entradas e saídas diretamente no SQLite."""
+        where, params = self._where(filtros)
+        tabela, contagem = self._origem(filtros)
+        query = (
+            f"SELECT LOWER(TRIM(tipo)) AS t, SUM(valor), {contagem} FROM {tabela}"
+            + where + " GROUP BY t"
+        )
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        somas = {t: (soma or 0) / CENTAVOS for t, soma, _ in rows}
+        entradas = somas.get("entrada", 0.0)
+        saidas = somas.get("saída", 0.0)
         return {
-            "trend_entradas": float(trend_entradas),
-            "trend_saidas": float(trend_saidas),
-            "trend_saldo": float(trend_saldo)
+            "entradas": entradas,
+            "saidas": saidas,
+            "saldo": entradas - saidas,
+            "total_lancamentos": sum(n for _, _, n in rows)
         }
-import sqlite3
-from datetime import date, datetime, timedelta
-from io import StringIO, BytesIO
-from typing import Optional, Dict, List, Tuple
-import calendar
-
-import numpy as np
-import pandas as pd
-import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-# -------------------- Config & Estilo --------------------
-st.set_page_config(
-    page_title="Fluxo de Caixa Pro", 
-    page_icon="💸", 
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-st.markdown(
-    """
-<style>
-:root { 
-    --top-pad: 1.5rem; 
-    --primary-color: #1f77b4;
-    --success-color: #2ca02c;
-    --warning-color: #ff7f0e;
-    --error-color: #d62728;
-}
-.block-container {padding-top: var(--top-pad);} 
-[data-testid="stMetricValue"] {font-weight: 700; font-size: 1.5rem;}
-[data-testid="stMetricDelta"] {font-size: 1rem;}
-div[data-testid="stDataFrame"] div[role="grid"] {font-size: 0.9rem;}
-h1, h2, h3 { margin-top: 0.5rem; margin-bottom: 0.8rem; }
-.metric-card {
-    background: white;
-    padding: 1rem;
-    border-radius: 0.5rem;
-    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    border-left: 4px solid var(--primary-color);
-}
-.positive { color: var(--success-color) !important; }
-.negative { color: var(--error-color) !important; }
-.stTabs [data-baseweb="tab-list"] {gap: 2rem;}
-.stSelectbox > div > div { background-color: #f8f9fa; }
-</style>
-""",
-    unsafe_allow_html=True,
-)
-
-# -------------------- Constantes --------------------
-DB_PATH = "fluxo_pro.db"
-LANC_COLUMNS = ["id", "data", "empresa", "descricao", "categoria", "tipo", "valor", "observacoes", "created_at", "updated_at"]
-TIPOS = ["Entrada", "Saída"]
-CATEGORIAS_ENTRADA = [
-    "Vendas", "Serviços", "Juros Recebidos", "Aluguéis Recebidos", 
-    "Dividendos", "Outras Receitas", "Transferência Entre Contas"
-]
-CATEGORIAS_SAIDA = [
-    "Fornecedores", "Salários", "Impostos", "Aluguel", "Utilities", 
-    "Marketing", "Manutenção", "Combustível", "Alimentação", 
-    "Outras Despesas", "Transferência Entre Contas"
-]
-EMPRESAS_PADRAO = [
-    "Gestão", "Gestão Fundo de Propaganda", "Effexus", 
-    "Effexus - utilizado para gestão", "Indústria", "Adriana"
-]
-
-# -------------------- Classes de Dados --------------------
-class LancamentoManager:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self._init_db()
     
-    def _init_db(self):
-        """Inicializa o banco de dados com as tabelas necessárias."""
-        conn = self.get_conn()
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS lancamentos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data TEXT NOT NULL,
-                empresa TEXT NOT NULL,
-                descricao TEXT,
-                categoria TEXT,
-                tipo TEXT NOT NULL,
-                valor REAL NOT NULL,
-                observacoes TEXT,
-                created_at TEXT,
-                updated_at TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS metas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                empresa TEXT NOT NULL,
-                mes TEXT NOT NULL,
-                meta_entrada REAL DEFAULT 0,
-                meta_saida REAL DEFAULT 0,
-                created_at TEXT
-            )
-        """)
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_data ON lancamentos(data)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_empresa ON lancamentos(empresa)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanc_tipo ON lancamentos(tipo)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_metas_empresa_mes ON metas(empresa, mes)")
-        conn.close()
+    def read_lancamentos(
+        self,
+        filtros: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Lê lançamentos com filtros, paginação e projeção de colunas opcionais (resultado em cache)."""
+        colunas = tuple(columns) if columns is not None else None
+        return _read_lancamentos_cached(self.db_path, _filtros_key(filtros), limit, offset, colunas)
     
-    def get_conn(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+    def _query_lancamentos(
+        self,
+        filtros: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> pd.DataFrame:
+        """Executa a consulta de lançamentos diretamente no banco."""
+        colunas = list(columns) if columns is not None else LANC_COLUMNS
+        desconhecidas = set(colunas) - set(LANC_COLUMNS)
+        if desconhecidas:
+            raise ValueError(f"Colunas inválidas: {sorted(desconhecidas)}")
+        if columns is not None and limit is None:
+            df = self._ler_snapshot(filtros, colunas)
+            if df is not None:
+                return df
+        where, params = self._where(filtros)
+        selecao = ", ".join(self.LEITURA_SQL.get(col, col) for col in colunas)
+        query = f"SELECT {selecao} FROM lancamentos" + where + " ORDER BY data DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        with self._lock:
+            df = pd.read_sql_query(query, self.conn, params=params)
+        return self._tipar(df, colunas)
     
-    def insert_lancamento(self, dados: Dict) -> bool:
-        """Insere um novo lançamento."""
+    @staticmethod
+    def _tipar(df: pd.DataFrame, colunas: List[str]) -> pd.DataFrame:
+        """Decodifica as colunas lidas do banco (centavos, dias, timestamps e categorias)."""
+        if df.empty:
+            return pd.DataFrame(columns=colunas)
+        if "id" in df.columns:
+            df["id"] = df["id"].astype("int32")
+        if "valor" in df.columns:
+            df["valor"] = pd.to_numeric(df["valor"], errors="coerce").fillna(0) / CENTAVOS
+        if "data" in df.columns:
+            df["data"] = pd.to_datetime(df["data"].to_numpy(), unit="D")
+        for col in ("created_at", "updated_at"):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format="%Y-%m-%d %H:%M:%S")
+        if "tipo" in df.columns:
+            df["tipo"] = df["tipo"].astype(TIPO_DTYPE)
+        for col in ("empresa", "categoria"):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+    
+    def iter_lancamentos(self, filtros: Optional[Dict] = None, tamanho: int = 10000) -> Iterator[List[Tuple]]:
+        """Percorre os lançamentos em blocos, já decodificados, por uma conexão de leitura própria (sem o lock)."""
+        where, params = self._where(filtros)
+        query = f"SELECT {', '.join(LANC_COLUMNS)} FROM lancamentos" + where + " ORDER BY data DESC, id DESC"
+        epoch = date.fromordinal(EPOCH_ORDINAL)
+        def _ts(segundos):
+            return None if segundos is None else datetime.fromtimestamp(segundos)
+        conn = self._conexao_leitura()
         try:
-            now = datetime.now().isoformat(timespec="seconds")
-            conn = self.get_conn()
-            conn.execute("""
-                INSERT INTO lancamentos 
-                (data, empresa, descricao, categoria, tipo, valor, observacoes, created_at, updated_at) 
-                VALUES (?,?,?,?,?,?,?,?,?)
-            """, [
-                dados.get("data"),
-                dados.get("empresa"),
-                dados.get("descricao", ""),
-                dados.get("categoria", ""),
-                dados.get("tipo", "Entrada"),
-                float(dados.get("valor", 0)),
-                dados.get("observacoes", ""),
-                now, now
-            ])
-            conn.commit()
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(tamanho)
+                if not rows:
+                    break
+                yield [
+                    (id_, epoch + timedelta(days=data), empresa, descricao, categoria, tipo,
+                     valor / CENTAVOS, observacoes, _ts(created_at), _ts(updated_at))
+                    for id_, data, empresa, descricao, categoria, tipo, valor, observacoes, created_at, updated_at in rows
+                ]
+        finally:
             conn.close()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao inserir lançamento: {e}")
-            return False
     
-    def read_lancamentos(self, filtros: Optional[Dict] = None) -> pd.DataFrame:
-        """Lê lançamentos com filtros opcionais."""
-        conn = self.get_conn()
-        query = "SELECT * FROM lancamentos"
-        params: List = []
-        if filtros:
-            conditions: List[str] = []
-            if filtros.get("empresa"):
-                conditions.append("empresa = ?")
-                params.append(filtros["empresa"])
-            if filtros.get("data_inicio"):
-                conditions.append("data >= ?")
-                params.append(filtros["data_inicio"])
-            if filtros.get("data_fim"):
-                conditions.append("data <= ?")
-                params.append(filtros["data_fim"])
-            if filtros.get("tipo"):
-                conditions.append("tipo = ?")
-                params.append(filtros["tipo"])
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY data DESC, id DESC"
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        if df.empty:
-            return pd.DataFrame(columns=LANC_COLUMNS)
-        df["valor"] = pd.to_numeric(df["valor"], errors="coerce").fillna(0.0)
+    def has_any(self) -> bool:
+        """Indica se existe ao menos um lançamento, lendo uma única linha."""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM lancamentos LIMIT 1").fetchone() is not None
+    
+    def count_lancamentos(self, filtros: Optional[Dict] = None) -> int:
+        """Conta os lançamentos que atendem aos filtros (resultado em cache)."""
+        return _count_lancamentos_cached(self.db_path, _filtros_key(filtros))
+    
+    def _query_count(self, filtros: Optional[Dict] = None) -> int:
+        """Executa o COUNT(*) dos lançamentos diretamente no banco."""
+        where, params = self._where(filtros)
+        tabela, contagem = self._origem(filtros)
+        with self._lock:
+            return self.conn.execute(f"SELECT COALESCE({contagem}, 0) FROM {tabela}" + where, params).fetchone()[0]
+    
+    def monthly_totals(self, filtros: Optional[Dict] = None) -> pd.DataFrame:
+        """Totais mensais de entradas e saídas (resultado em cache)."""
+        return _monthly_totals_cached(self.db_path, _filtros_key(filtros))
+    
+    def _query_monthly_totals(self, filtros: Optional[Dict] = None) -> pd.DataFrame:
+        """Totais mensais de entradas e saídas agregados no SQLite."""
+        where, params = self._where(filtros)
+        query = (
+            "SELECT strftime('%Y-%m', data + 2440587.5) AS mes,"
+            " SUM(CASE WHEN LOWER(TRIM(tipo)) = 'entrada' THEN valor ELSE 0 END) AS entrada,"
+            " SUM(CASE WHEN LOWER(TRIM(tipo)) = 'saída' THEN valor ELSE 0 END) AS saida"
+            f" FROM {self._origem(filtros)[0]}" + where + " GROUP BY mes ORDER BY mes"
+        )
+        with self._lock:
+            monthly = pd.read_sql_query(query, self.conn, params=params)
+        monthly[["entrada", "saida"]] = monthly[["entrada", "saida"]] / CENTAVOS
+        return monthly
+    
+    def aggregate_by(self, group_cols: Tuple[str, ...], filtros: Optional[Dict] = None) -> pd.DataFrame:
+        """Soma e conta os lançamentos agrupados no SQLite (resultado em cache)."""
+        return _aggregate_by_cached(self.db_path, tuple(group_cols), _filtros_key(filtros))
+    
+    def _query_aggregate_by(self, group_cols: Tuple[str, ...], filtros: Optional[Dict] = None) -> pd.DataFrame:
+        """Executa o GROUP BY pelas colunas informadas diretamente no banco."""
+        where, params = self._where(filtros)
+        tabela, contagem = self._origem(filtros)
+        colunas = ", ".join(f"{self.AGRUPAMENTOS[col]} AS {col}" for col in group_cols)
+        grupos = ", ".join(str(posicao) for posicao in range(1, len(group_cols) + 1))
+        query = (
+            f"SELECT {colunas}, SUM(valor) AS total, {contagem} AS n FROM {tabela}"
+            + where + f" GROUP BY {grupos} ORDER BY {grupos}"
+        )
+        with self._lock:
+            df = pd.read_sql_query(query, self.conn, params=params)
+        df["total"] = df["total"] / CENTAVOS
+        if "tipo" in df.columns:
+            df["tipo"] = df["tipo"].astype(TIPO_DTYPE)
+        for col in ("empresa", "categoria"):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
         return df
     
+    def list_empresas(self) -> List[str]:
+        """Lista as empresas distintas cadastradas (resultado em cache)."""
+        return _list_empresas_cached(self.db_path)
+    
+    def _query_empresas(self) -> List[str]:
+        """Consulta as empresas distintas usando apenas o índice por empresa."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT empresa FROM lancamentos WHERE TRIM(empresa) <> '' ORDER BY empresa"
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def resumo(self) -> Dict:
+        """Resumo da base para a barra lateral (resultado em cache)."""
+        return _resumo_cached(self.db_path)
+    
+    def _query_resumo(self) -> Dict:
+        """Conta registros e empresas e busca o período coberto em uma única consulta."""
+        with self._lock:
+            total, empresas, dia_min, dia_max = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT empresa), MIN(data), MAX(data) FROM lancamentos"
+            ).fetchone()
+        epoch = date.fromordinal(EPOCH_ORDINAL)
+        return {
+            "total_registros": total,
+            "empresas_ativas": empresas,
+            "data_mais_antiga": epoch + timedelta(days=dia_min) if total else None,
+            "data_mais_recente": epoch + timedelta(days=dia_max) if total else None
+        }
+    
     def update_lancamento(self, id_: int, dados: Dict) -> bool:
         """Atualiza um lançamento existente."""
         try:
-            now = datetime.now().isoformat(timespec="seconds")
-            conn = self.get_conn()
-            conn.execute("""
-                UPDATE lancamentos 
-                SET data=?, empresa=?, descricao=?, categoria=?, tipo=?, valor=?, observacoes=?, updated_at=? 
-                WHERE id=?
-            """, [
-                dados.get("data"),
-                dados.get("empresa"),
-                dados.get("descricao", ""),
-                dados.get("categoria", ""),
-                dados.get("tipo", "Entrada"),
-                float(dados.get("valor", 0)),
-                dados.get("observacoes", ""),
-                now, int(id_)
-            ])
-            conn.commit()
-            conn.close()
+            now = int(time.time())
+            with self._lock, self.conn:
+                self.conn.execute(self.UPDATE_SQL, (
+                    data_para_dias(dados.get("data")),
+                    dados.get("empresa"),
+                    dados.get("descricao", ""),
+                    dados.get("categoria", ""),
+                    normalizar_tipo(dados.get("tipo", "Entrada")),
+                    valor_para_centavos(dados.get("valor", 0)),
+                    dados.get("observacoes", ""),
+                    now, int(id_)
+                ))
+            self._apos_escrita()
             return True
         except Exception as e:
             st.error(f"Erro ao atualizar lançamento: {e}")
@@ -469,10 +686,9 @@ class LancamentoManager:
     def delete_lancamento(self, id_: int) -> bool:
         """Exclui um lançamento."""
         try:
-            conn = self.get_conn()
-            conn.execute("DELETE FROM lancamentos WHERE id = ?", [int(id_)])
-            conn.commit()
-            conn.close()
+            with self._lock, self.conn:
+                self.conn.execute(self.DELETE_SQL, (int(id_),))
+            self._apos_escrita()
             return True
         except Exception as e:
             st.error(f"Erro ao excluir lançamento: {e}")
@@ -482,115 +698,223 @@ class AnalyticsEngine:
     def __init__(self, manager: LancamentoManager):
         self.manager = manager
     
-    def calcular_kpis(self, df: pd.DataFrame) -> Dict:
-        """Calcula KPIs principais."""
-        if df.empty:
-            return {"entradas": 0, "saidas": 0, "saldo": 0, "total_lancamentos": 0}
-        df_clean = df.copy()
-        df_clean["tipo_norm"] = df_clean["tipo"].astype(str).str.strip().str.lower()
-        entradas = df_clean.loc[df_clean["tipo_norm"] == "entrada", "valor"].sum()
-        saidas = df_clean.loc[df_clean["tipo_norm"] == "saída", "valor"].sum()
-        saldo = entradas - saidas
-        total_lancamentos = len(df_clean)
-        return {
-            "entradas": float(entradas),
-            "saidas": float(saidas),
-            "saldo": float(saldo),
-            "total_lancamentos": total_lancamentos
-        }
+    def calcular_kpis(self, filtros: Optional[Dict] = None) -> Dict:
+        """Calcula KPIs principais no SQLite (resultado em cache)."""
+        return self.manager.aggregate_kpis(filtros)
     
-    def calcular_trends(self, df: pd.DataFrame, periodo: int = 6) -> Dict:
-        """Calcula tendências dos últimos N meses."""
-        if df.empty:
-            return {"trend_entradas": 0, "trend_saidas": 0, "trend_saldo": 0}
-        df_trend = df.copy()
-        df_trend["data_dt"] = pd.to_datetime(df_trend["data"], errors="coerce")
-        df_trend = df_trend.dropna(subset=["data_dt"])
-        data_corte = datetime.now() - timedelta(days=periodo * 30)
-        df_trend = df_trend[df_trend["data_dt"] >= data_corte]
-        if df_trend.empty:
+    @staticmethod
+    def _variacao_media(mensal: np.ndarray) -> float:
+        """Média das variações percentuais entre meses consecutivos."""
+        if len(mensal) < 2:
+            return 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variacoes = (mensal[1:] - mensal[:-1]) / mensal[:-1]
+        variacoes = variacoes[~np.isnan(variacoes)]
+        return variacoes.mean() * 100 if variacoes.size else np.nan
+    
+    def calcular_trends(self, periodo: int = 6, filtros: Optional[Dict] = None) -> Dict:
+        """Calcula tendências dos últimos N meses a partir dos totais mensais do SQLite."""
+        inicio = (datetime.now() - timedelta(days=periodo * 30)).date() + timedelta(days=1)
+        filtros = dict(filtros or {})
+        if not filtros.get("data_inicio") or data_para_dias(filtros["data_inicio"]) < data_para_dias(inicio):
+            filtros["data_inicio"] = inicio.isoformat()
+        mensal = self.manager.monthly_totals(filtros)
+        if mensal.empty:
             return {"trend_entradas": 0, "trend_saidas": 0, "trend_saldo": 0}
-        df_trend["mes"] = df_trend["data_dt"].dt.to_period("M")
-        df_trend["tipo_norm"] = df_trend["tipo"].astype(str).str.strip().str.lower()
-        monthly = df_trend.groupby(["mes", "tipo_norm"])["valor"].sum().unstack(fill_value=0)
-        if "entrada" in monthly.columns and len(monthly) >= 2:
-            trend_entradas = monthly["entrada"].pct_change().mean() * 100
-        else:
-            trend_entradas = 0
-        if "saída" in monthly.columns and len(monthly) >= 2:
-            trend_saidas = monthly["saída"].pct_change().mean() * 100
-        else:
-            trend_saidas = 0
-        saldo_mensal = monthly.get("entrada", 0) - monthly.get("saída", 0)
-        if len(saldo_mensal) >= 2:
-            trend_saldo = saldo_mensal.pct_change().mean() * 100
-        else:
-            trend_saldo = 0
+        entradas = mensal["entrada"].to_numpy()
+        saidas = mensal["saida"].to_numpy()
+        trend_entradas = self._variacao_media(entradas) if entradas.any() else 0
+        trend_saidas = self._variacao_media(saidas) if saidas.any() else 0
+        trend_saldo = self._variacao_media(entradas - saidas)
         return {
             "trend_entradas": float(trend_entradas),
             "trend_saidas": float(trend_saidas),
             "trend_saldo": float(trend_saldo)
         }
 
+# -------------------- Cache --------------------
+@st.cache_resource
+def get_manager(path: str) -> LancamentoManager:
+    return LancamentoManager(path)
+
+def _filtros_key(filtros: Optional[Dict]) -> Tuple:
+    """Converte o dicionário de filtros em uma chave de cache hashable."""
+    return tuple(sorted((filtros or {}).items()))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _read_lancamentos_cached(
+    db_path: str,
+    filtros_tuple: Tuple,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    columns: Optional[Tuple[str, ...]] = None
+) -> pd.DataFrame:
+    return get_manager(db_path)._query_lancamentos(dict(filtros_tuple), limit, offset, columns)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _count_lancamentos_cached(db_path: str, filtros_tuple: Tuple) -> int:
+    return get_manager(db_path)._query_count(dict(filtros_tuple))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _list_empresas_cached(db_path: str) -> List[str]:
+    return get_manager(db_path)._query_empresas()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _aggregate_kpis_cached(db_path: str, filtros_tuple: Tuple) -> Dict:
+    return get_manager(db_path)._query_kpis(dict(filtros_tuple))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _monthly_totals_cached(db_path: str, filtros_tuple: Tuple) -> pd.DataFrame:
+    return get_manager(db_path)._query_monthly_totals(dict(filtros_tuple))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _aggregate_by_cached(db_path: str, group_cols: Tuple[str, ...], filtros_tuple: Tuple) -> pd.DataFrame:
+    return get_manager(db_path)._query_aggregate_by(group_cols, dict(filtros_tuple))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _resumo_cached(db_path: str) -> Dict:
+    return get_manager(db_path)._query_resumo()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _monthly_por_tipo_cached(db_path: str, filtros_tuple: Tuple, ano: int, label: str) -> pd.DataFrame:
+    por_mes = get_manager(db_path).aggregate_by(("mes", "tipo"), dict(filtros_tuple))
+    por_mes["tipo_norm"] = por_mes["tipo"].cat.rename_categories(str.lower)
+    monthly = por_mes.groupby(["mes", "tipo_norm"], observed=True)["total"].sum().unstack(fill_value=0)
+    monthly = monthly.reindex(range(1, 13), fill_value=0)
+    monthly["periodo"] = label
+    monthly["ano"] = ano
+    return monthly.reset_index()
+
+def _invalidar_cache():
+    """Descarta os resultados em cache após qualquer escrita no banco."""
+    _read_lancamentos_cached.clear()
+    _count_lancamentos_cached.clear()
+    _list_empresas_cached.clear()
+    _aggregate_kpis_cached.clear()
+    _monthly_totals_cached.clear()
+    _aggregate_by_cached.clear()
+    _resumo_cached.clear()
+    _monthly_por_tipo_cached.clear()
+    _grafico_linha_tempo.clear()
+    _grafico_empresas.clear()
+    _grafico_categorias.clear()
+    _grafico_mensal.clear()
+
 # -------------------- Utilitários --------------------
+def valor_para_centavos(valor) -> int:
+    """Converte um valor em reais para centavos inteiros (armazenamento exato)."""
+    return int(round(float(valor) * CENTAVOS))
+
+def data_para_dias(valor) -> int:
+    """Converte uma data (ou string ISO) em dias desde 1970-01-01."""
+    if isinstance(valor, str):
+        valor = date.fromisoformat(valor[:10])
+    return valor.toordinal() - EPOCH_ORDINAL
+
+_TIPOS_CANONICOS = {tipo.lower(): tipo for tipo in TIPOS}
+
+def normalizar_tipo(valor) -> str:
+    """Forma canônica (TIPOS) de um tipo com outra caixa ou espaços; valores desconhecidos ficam como estão."""
+    return _TIPOS_CANONICOS.get(str(valor).strip().lower(), valor)
+
+_PONTO_VIRGULA = str.maketrans({",": ".", ".": ","})
+
 def fmt_currency(value: float, simbolo: str = "R$") -> str:
     try:
         valor = float(value)
-        formatted = f"{abs(valor):,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+        if np.isnan(valor):
+            return f"{simbolo} 0,00"
+        formatted = f"{abs(valor):,.2f}".translate(_PONTO_VIRGULA)
         prefix = f"{simbolo} " if valor >= 0 else f"-{simbolo} "
         return f"{prefix}{formatted}"
     except Exception:
         return f"{simbolo} 0,00"
 
+def fmt_currency_series(valores: pd.Series, simbolo: str = "R$") -> pd.Series:
+    """Versão vetorizada de fmt_currency para colunas inteiras (NaN e não numéricos viram 0,00)."""
+    numeros = pd.to_numeric(valores, errors="coerce").fillna(0.0)
+    formatted = numeros.abs().map("{:,.2f}".format).str.translate(_PONTO_VIRGULA)
+    prefix = pd.Series(np.where(numeros.ge(0), f"{simbolo} ", f"-{simbolo} "), index=numeros.index)
+    return prefix + formatted
+
+def fmt_int(value: int) -> str:
+    """Inteiro com separador de milhar brasileiro (1.234)."""
+    return format(int(value), ",").translate(_PONTO_VIRGULA)
+
 def fmt_percentage(value: float) -> str:
     try:
         return f"{float(value):.1f}%"
     except Exception:
         return "0.0%"
 
-def get_empresas_list(df: pd.DataFrame) -> List[str]:
-    if df.empty:
-        return EMPRESAS_PADRAO
-    empresas = sorted([e for e in df["empresa"].dropna().unique() if e.strip()])
-    return empresas or EMPRESAS_PADRAO
+def exportar_csv(manager: LancamentoManager, filtros: Dict) -> str:
+    """Gera o CSV dos lançamentos em blocos, sem montar um DataFrame."""
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=";", lineterminator="\n")
+    writer.writerow(LANC_COLUMNS)
+    for rows in manager.iter_lancamentos(filtros):
+        writer.writerows(rows)
+    return buffer.getvalue()
 
-def criar_grafico_linha_tempo(df: pd.DataFrame, titulo: str) -> go.Figure:
-    if df.empty:
+def exportar_excel(manager: LancamentoManager, filtros: Dict, abas: Dict[str, pd.DataFrame]) -> bytes:
+    """Gera o Excel com xlsxwriter em constant_memory: cada linha é gravada e liberada em seguida.
+    
+    Datas usam o mesmo formato de DataFrame.to_excel, como na exportação via pandas."""
+    buffer = BytesIO()
+    wb = xlsxwriter.Workbook(buffer, {"constant_memory": True})
+    fmt_data = wb.add_format({"num_format": "YYYY-MM-DD HH:MM:SS"})
+    formatos = [fmt_data if col in ("data", "created_at", "updated_at") else None for col in LANC_COLUMNS]
+    ws = wb.add_worksheet("Lançamentos")
+    ws.write_row(0, 0, LANC_COLUMNS)
+    linha = 1
+    for rows in manager.iter_lancamentos(filtros):
+        for row in rows:
+            for col, (valor, formato) in enumerate(zip(row, formatos)):
+                ws.write(linha, col, valor, formato)
+            linha += 1
+    for nome, df in abas.items():
+        if df.empty:
+            continue
+        ws = wb.add_worksheet(nome)
+        ws.write_row(0, 0, [str(col) for col in df.columns])
+        for linha, row in enumerate(df.itertuples(index=False), start=1):
+            ws.write_row(linha, 0, row)
+    wb.close()
+    return buffer.getvalue()
+
+def criar_grafico_linha_tempo(monthly: pd.DataFrame, titulo: str) -> go.Figure:
+    """Gráfico mensal a partir dos totais de LancamentoManager.monthly_totals."""
+    if monthly.empty:
         return go.Figure()
     fig = make_subplots(specs=[[{"secondary_y": True}]])
-    df_plot = df.copy()
-    df_plot["data_dt"] = pd.to_datetime(df_plot["data"], errors="coerce")
-    df_plot = df_plot.dropna(subset=["data_dt"])
-    df_plot["mes"] = df_plot["data_dt"].dt.to_period("M").astype(str)
-    df_plot["tipo_norm"] = df_plot["tipo"].astype(str).str.strip().str.lower()
-    monthly = df_plot.groupby(["mes", "tipo_norm"])["valor"].sum().unstack(fill_value=0)
-    monthly = monthly.reset_index()
-    monthly["data_mes"] = pd.to_datetime(monthly["mes"] + "-01")
-    if "entrada" in monthly.columns:
+    data_mes = pd.to_datetime(monthly["mes"], format="%Y-%m")
+    tem_entrada = bool(monthly["entrada"].any())
+    tem_saida = bool(monthly["saida"].any())
+    if tem_entrada:
         fig.add_trace(
             go.Scatter(
-                x=monthly["data_mes"],
+                x=data_mes,
                 y=monthly["entrada"],
                 name="Entradas",
                 line=dict(color="#2ca02c", width=3),
                 mode="lines+markers"
             )
         )
-    if "saída" in monthly.columns:
+    if tem_saida:
         fig.add_trace(
             go.Scatter(
-                x=monthly["data_mes"],
-                y=monthly["saída"],
+                x=data_mes,
+                y=monthly["saida"],
                 name="Saídas",
                 line=dict(color="#d62728", width=3),
                 mode="lines+markers"
             )
         )
-    if "entrada" in monthly.columns and "saída" in monthly.columns:
-        saldo = monthly["entrada"] - monthly["saída"]
+    if tem_entrada and tem_saida:
+        saldo = monthly["entrada"] - monthly["saida"]
         fig.add_trace(
             go.Scatter(
-                x=monthly["data_mes"],
+                x=data_mes,
                 y=saldo,
                 name="Saldo",
                 line=dict(color="#1f77b4", width=2, dash="dash"),
@@ -611,15 +935,80 @@ def criar_grafico_linha_tempo(df: pd.DataFrame, titulo: str) -> go.Figure:
     fig.update_xaxes(type="date")
     return fig
 
+# Figuras do dashboard em cache: a chave é o próprio dado plotado (agregados
+# pequenos, com hash barato), então a figura nunca fica presa a outro recorte.
+@st.cache_data(ttl=300, show_spinner=False)
+def _grafico_linha_tempo(monthly: pd.DataFrame, titulo: str) -> go.Figure:
+    return criar_grafico_linha_tempo(monthly, titulo)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _grafico_pizza_tipos(entradas: float, saidas: float) -> go.Figure:
+    return px.pie(
+        values=[entradas, saidas],
+        names=["Entradas", "Saídas"],
+        title="Distribuição: Entradas vs Saídas",
+        color_discrete_map={"Entradas": "#2ca02c", "Saídas": "#d62728"}
+    )
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _grafico_empresas(top_empresas: pd.Series) -> go.Figure:
+    return px.bar(
+        x=top_empresas.values,
+        y=top_empresas.index,
+        orientation="h",
+        title="Top 10 Empresas por Movimentação",
+        labels={"x": "Valor Total (R$)", "y": "Empresa"}
+    )
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _grafico_categorias(df_cat: pd.DataFrame) -> go.Figure:
+    fig = px.bar(
+        df_cat,
+        x="categoria",
+        y="valor",
+        color="tipo",
+        title="Movimentação por Categoria",
+        labels={"valor": "Valor (R$)", "categoria": "Categoria"},
+        color_discrete_map={"Entrada": "#2ca02c", "Saída": "#d62728"}
+    )
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _grafico_mensal(pivot_mensal: pd.DataFrame, ano: int) -> go.Figure:
+    fig = go.Figure()
+    if "Entrada" in pivot_mensal.columns:
+        fig.add_trace(go.Bar(
+            name="Entradas",
+            x=pivot_mensal["mes_nome"],
+            y=pivot_mensal["Entrada"],
+            marker_color="#2ca02c"
+        ))
+    if "Saída" in pivot_mensal.columns:
+        fig.add_trace(go.Bar(
+            name="Saídas",
+            x=pivot_mensal["mes_nome"],
+            y=pivot_mensal["Saída"],
+            marker_color="#d62728"
+        ))
+    fig.update_layout(
+        title=f"Movimentação Mensal - {ano}",
+        xaxis_title="Mês",
+        yaxis_title="Valor (R$)",
+        barmode="group",
+        height=400
+    )
+    return fig
+
 # -------------------- Páginas --------------------
 def page_lancamentos():
     st.subheader("📥 Gestão de Lançamentos")
-    manager = LancamentoManager(DB_PATH)
+    manager = get_manager(DB_PATH)
     with st.form("novo_lancamento", clear_on_submit=True):
         st.markdown("**➕ Novo Lançamento**")
         col1, col2, col3 = st.columns(3)
         with col1:
-            empresas = get_empresas_list(manager.read_lancamentos())
+            empresas = manager.list_empresas() or EMPRESAS_PADRAO
             empresa = st.selectbox("Empresa", empresas)
             data_mov = st.date_input("Data", value=date.today(), format="DD/MM/YYYY")
         with col2:
@@ -650,7 +1039,7 @@ def page_lancamentos():
     st.markdown("**🔍 Filtros**")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        empresas_filtro = ["Todas"] + get_empresas_list(manager.read_lancamentos())
+        empresas_filtro = ["Todas"] + (manager.list_empresas() or EMPRESAS_PADRAO)
         empresa_filtro = st.selectbox("Filtrar por Empresa", empresas_filtro)
     with col2:
         data_inicio = st.date_input("Data Início", format="DD/MM/YYYY")
@@ -668,14 +1057,25 @@ def page_lancamentos():
         filtros["data_fim"] = data_fim.isoformat()
     if tipo_filtro != "Todos":
         filtros["tipo"] = tipo_filtro
-    df = manager.read_lancamentos(filtros)
+    total_registros = manager.count_lancamentos(filtros)
+    total_paginas = max(1, -(-total_registros // LANC_POR_PAGINA))
+    if st.session_state.get("lanc_filtros") != filtros:
+        st.session_state["lanc_filtros"] = filtros
+        st.session_state["page"] = 0
+    pagina = min(st.session_state.get("page", 0), total_paginas - 1)
+    df = manager.read_lancamentos(filtros, limit=LANC_POR_PAGINA, offset=pagina * LANC_POR_PAGINA)
     if not df.empty:
-        df_display = df.copy()
-        df_display["data_dt"] = pd.to_datetime(df_display["data"], errors="coerce")
-        df_display["Data"] = df_display["data_dt"].dt.strftime("%d/%m/%Y")
-        df_display["Valor"] = df_display["valor"].apply(fmt_currency)
-        cols_display = ["id", "Data", "empresa", "descricao", "categoria", "tipo", "Valor"]
-        st.markdown(f"**📋 Lançamentos ({len(df)} registros)**")
+        df_display = pd.DataFrame({
+            "id": df["id"],
+            "Data": df["data"].dt.strftime("%d/%m/%Y"),
+            "empresa": df["empresa"],
+            "descricao": df["descricao"],
+            "categoria": df["categoria"],
+            "tipo": df["tipo"],
+            "Valor": fmt_currency_series(df["valor"])
+        })
+        cols_display = list(df_display.columns)
+        st.markdown(f"**📋 Lançamentos ({total_registros} registros)**")
         st.dataframe(
             df_display[cols_display], 
             use_container_width=True, 
@@ -690,19 +1090,30 @@ def page_lancamentos():
                 "Valor": st.column_config.TextColumn("Valor", width="small")
             }
         )
+        if total_paginas > 1:
+            def _mudar_pagina(delta: int):
+                st.session_state["page"] = min(max(pagina + delta, 0), total_paginas - 1)
+            col_ant, col_info, col_prox = st.columns([1, 2, 1])
+            with col_ant:
+                st.button("⬅️ Anterior", on_click=_mudar_pagina, args=(-1,), disabled=pagina == 0, use_container_width=True)
+            with col_info:
+                st.caption(f"Página {pagina + 1} de {total_paginas}")
+            with col_prox:
+                st.button("Próxima ➡️", on_click=_mudar_pagina, args=(1,), disabled=pagina >= total_paginas - 1, use_container_width=True)
     else:
         st.info("📝 Nenhum lançamento encontrado com os filtros aplicados")
     if not df.empty:
-        with st.expander("✏️ Editar/Excluir Lançamentos"):
+        # Os widgets de edição só são construídos quando o usuário pede.
+        if st.checkbox("✏️ Editar/Excluir Lançamentos", key="show_edit"):
             lancamento_id = st.selectbox("Selecionar Lançamento", df["id"].tolist())
             lancamento = df[df["id"] == lancamento_id].iloc[0]
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown("**👋 Editar Lançamento**")
                 with st.form(f"edit_{lancamento_id}"):
-                    empresas_edit = get_empresas_list(df)
+                    empresas_edit = manager.list_empresas() or EMPRESAS_PADRAO
                     empresa_edit = st.selectbox("Empresa", empresas_edit, index=empresas_edit.index(lancamento["empresa"]) if lancamento["empresa"] in empresas_edit else 0)
-                    data_edit = st.date_input("Data", value=pd.to_datetime(lancamento["data"]).date(), format="DD/MM/YYYY")
+                    data_edit = st.date_input("Data", value=lancamento["data"].date(), format="DD/MM/YYYY")
                     tipo_edit = st.selectbox("Tipo", TIPOS, index=TIPOS.index(lancamento["tipo"]) if lancamento["tipo"] in TIPOS else 0)
                     categorias_edit = CATEGORIAS_ENTRADA if tipo_edit == "Entrada" else CATEGORIAS_SAIDA
                     categoria_idx = categorias_edit.index(lancamento["categoria"]) if lancamento["categoria"] in categorias_edit else 0
@@ -726,7 +1137,7 @@ def page_lancamentos():
             with col2:
                 st.markdown("**🗑️ Excluir Lançamento**")
                 st.write(f"**ID:** {lancamento['id']}")
-                st.write(f"**Data:** {pd.to_datetime(lancamento['data']).strftime('%d/%m/%Y')}")
+                st.write(f"**Data:** {lancamento['data'].strftime('%d/%m/%Y')}")
                 st.write(f"**Empresa:** {lancamento['empresa']}")
                 st.write(f"**Descrição:** {lancamento['descricao']}")
                 st.write(f"**Valor:** {fmt_currency(lancamento['valor'])}")
@@ -737,11 +1148,11 @@ def page_lancamentos():
 
 def page_dashboard():
     st.subheader("📈 Dashboard Executivo")
-    manager = LancamentoManager(DB_PATH)
+    manager = get_manager(DB_PATH)
     analytics = AnalyticsEngine(manager)
     col1, col2, col3 = st.columns(3)
     with col1:
-        empresas = ["Todas"] + get_empresas_list(manager.read_lancamentos())
+        empresas = ["Todas"] + (manager.list_empresas() or EMPRESAS_PADRAO)
         empresa_dash = st.selectbox("Empresa", empresas)
     with col2:
         anos_disponiveis = list(range(2020, datetime.now().year + 2))
@@ -754,9 +1165,8 @@ def page_dashboard():
     }
     if empresa_dash != "Todas":
         filtros["empresa"] = empresa_dash
-    df_filtered = manager.read_lancamentos(filtros)
-    kpis = analytics.calcular_kpis(df_filtered)
-    trends = analytics.calcular_trends(df_filtered, periodo_trend)
+    kpis = analytics.calcular_kpis(filtros=filtros)
+    trends = analytics.calcular_trends(periodo=periodo_trend, filtros=filtros)
     st.markdown("### 📈 Indicadores Principais")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -780,110 +1190,68 @@ def page_dashboard():
     with col4:
         st.metric(
             "📊 Total Lançamentos",
-            f"{kpis['total_lancamentos']:,}".replace(",", "."),
+            fmt_int(kpis["total_lancamentos"]),
             ""
         )
-    if df_filtered.empty:
+    if kpis["total_lancamentos"] == 0:
         st.info("📝 Nenhum dado disponível para o período selecionado")
         return
     st.markdown("### 📈 Análise Temporal")
     tab1, tab2, tab3 = st.tabs(["📈 Visão Geral", "🏢 Por Categoria", "📅 Detalhamento Mensal"])
     with tab1:
-        fig_principal = criar_grafico_linha_tempo(df_filtered, f"Evolução Financeira - {ano_dash}")
+        fig_principal = _grafico_linha_tempo(manager.monthly_totals(filtros), f"Evolução Financeira - {ano_dash}")
         st.plotly_chart(fig_principal, use_container_width=True)
         col_a, col_b = st.columns(2)
         with col_a:
-            fig_pie_tipo = px.pie(
-                values=[kpis["entradas"], kpis["saidas"]],
-                names=["Entradas", "Saídas"],
-                title="Distribuição: Entradas vs Saídas",
-                color_discrete_map={"Entradas": "#2ca02c", "Saídas": "#d62728"}
-            )
+            fig_pie_tipo = _grafico_pizza_tipos(kpis["entradas"], kpis["saidas"])
             st.plotly_chart(fig_pie_tipo, use_container_width=True)
         with col_b:
             if empresa_dash == "Todas":
-                df_empresas = df_filtered.groupby("empresa")["valor"].sum().sort_values(ascending=False).head(10)
-                fig_bar_empresas = px.bar(
-                    x=df_empresas.values,
-                    y=df_empresas.index,
-                    orientation="h",
-                    title="Top 10 Empresas por Movimentação",
-                    labels={"x": "Valor Total (R$)", "y": "Empresa"}
+                df_empresas = (
+                    manager.aggregate_by(("empresa",), filtros)
+                    .set_index("empresa")["total"]
+                    .sort_values(ascending=False)
+                    .head(10)
                 )
+                fig_bar_empresas = _grafico_empresas(df_empresas)
                 st.plotly_chart(fig_bar_empresas, use_container_width=True)
     with tab2:
-        df_cat = df_filtered.groupby(["categoria", "tipo"])["valor"].sum().reset_index()
+        df_cat = manager.aggregate_by(("categoria", "tipo"), filtros).rename(columns={"total": "valor"})
         if not df_cat.empty:
-            fig_cat = px.bar(
-                df_cat,
-                x="categoria",
-                y="valor",
-                color="tipo",
-                title="Movimentação por Categoria",
-                labels={"valor": "Valor (R$)", "categoria": "Categoria"},
-                color_discrete_map={"Entrada": "#2ca02c", "Saída": "#d62728"}
-            )
-            fig_cat.update_xaxes(tickangle=45)
+            fig_cat = _grafico_categorias(df_cat)
             st.plotly_chart(fig_cat, use_container_width=True)
         st.markdown("**📋 Resumo por Categoria**")
-        pivot_cat = df_filtered.pivot_table(
-            index="categoria",
-            columns="tipo",
-            values="valor",
-            aggfunc="sum",
-            fill_value=0
-        ).reset_index()
+        pivot_cat = (
+            df_cat.groupby(["categoria", "tipo"], observed=True)["valor"].sum()
+            .unstack(fill_value=0)
+            .reset_index()
+        )
         if "Entrada" in pivot_cat.columns and "Saída" in pivot_cat.columns:
             pivot_cat["Saldo"] = pivot_cat["Entrada"] - pivot_cat["Saída"]
+        pivot_cat_display = pivot_cat.copy()
         for col in ["Entrada", "Saída", "Saldo"]:
-            if col in pivot_cat.columns:
-                pivot_cat[f"{col}_fmt"] = pivot_cat[col].apply(fmt_currency)
-        cols_display = ["categoria"] + [f"{col}_fmt" for col in ["Entrada", "Saída", "Saldo"] if f"{col}_fmt" in pivot_cat.columns]
-        st.dataframe(pivot_cat[cols_display], use_container_width=True, hide_index=True)
+            if col in pivot_cat_display.columns:
+                pivot_cat_display[f"{col}_fmt"] = fmt_currency_series(pivot_cat_display[col])
+        cols_display = ["categoria"] + [f"{col}_fmt" for col in ["Entrada", "Saída", "Saldo"] if f"{col}_fmt" in pivot_cat_display.columns]
+        st.dataframe(pivot_cat_display[cols_display], use_container_width=True, hide_index=True)
     with tab3:
-        df_mensal = df_filtered.copy()
-        df_mensal["data_dt"] = pd.to_datetime(df_mensal["data"], errors="coerce")
-        df_mensal = df_mensal.dropna(subset=["data_dt"])
-        df_mensal["mes_num"] = df_mensal["data_dt"].dt.month
-        df_mensal["mes_nome"] = df_mensal["data_dt"].dt.strftime("%B")
-        pivot_mensal = df_mensal.pivot_table(
-            index=["mes_num", "mes_nome"],
-            columns="tipo",
-            values="valor",
-            aggfunc="sum",
-            fill_value=0
-        ).reset_index()
+        df_mensal = manager.aggregate_by(("mes", "tipo"), filtros).rename(columns={"mes": "mes_num"})
+        df_mensal["mes_nome"] = [calendar.month_name[m] for m in df_mensal["mes_num"]]
+        pivot_mensal = (
+            df_mensal.groupby(["mes_num", "mes_nome", "tipo"], observed=True)["total"].sum()
+            .unstack(fill_value=0)
+            .reset_index()
+        )
         if "Entrada" in pivot_mensal.columns and "Saída" in pivot_mensal.columns:
             pivot_mensal["Saldo"] = pivot_mensal["Entrada"] - pivot_mensal["Saída"]
             pivot_mensal["Saldo_Acum"] = pivot_mensal["Saldo"].cumsum()
-        fig_mensal = go.Figure()
-        if "Entrada" in pivot_mensal.columns:
-            fig_mensal.add_trace(go.Bar(
-                name="Entradas",
-                x=pivot_mensal["mes_nome"],
-                y=pivot_mensal["Entrada"],
-                marker_color="#2ca02c"
-            ))
-        if "Saída" in pivot_mensal.columns:
-            fig_mensal.add_trace(go.Bar(
-                name="Saídas",
-                x=pivot_mensal["mes_nome"],
-                y=pivot_mensal["Saída"],
-                marker_color="#d62728"
-            ))
-        fig_mensal.update_layout(
-            title=f"Movimentação Mensal - {ano_dash}",
-            xaxis_title="Mês",
-            yaxis_title="Valor (R$)",
-            barmode="group",
-            height=400
-        )
+        fig_mensal = _grafico_mensal(pivot_mensal, ano_dash)
         st.plotly_chart(fig_mensal, use_container_width=True)
         st.markdown("**🗓þ00 Tabela Mensal Detalhada**")
         pivot_display = pivot_mensal.copy()
         for col in ["Entrada", "Saída", "Saldo", "Saldo_Acum"]:
             if col in pivot_display.columns:
-                pivot_display[f"{col}_fmt"] = pivot_display[col].apply(fmt_currency)
+                pivot_display[f"{col}_fmt"] = fmt_currency_series(pivot_display[col])
         cols_show = ["mes_nome"] + [f"{col}_fmt" for col in ["Entrada", "Saída", "Saldo", "Saldo_Acum"] if f"{col}_fmt" in pivot_display.columns]
         st.dataframe(
             pivot_display[cols_show], 
@@ -900,25 +1268,17 @@ def page_dashboard():
     st.markdown("### 📅 Exportar Dados")
     col1, col2, col3 = st.columns(3)
     with col1:
-        csv_buffer = StringIO()
-        df_filtered.to_csv(csv_buffer, index=False, sep=";", encoding="utf-8")
         st.download_button(
             "📄 Baixar CSV",
-            data=csv_buffer.getvalue(),
+            data=lambda: exportar_csv(manager, filtros),
             file_name=f"fluxo_caixa_{empresa_dash}_{ano_dash}.csv",
             mime="text/csv"
         )
     with col2:
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df_filtered.to_excel(writer, sheet_name='Lançamentos', index=False)
-            if not df_cat.empty:
-                pivot_cat.to_excel(writer, sheet_name='Por Categoria', index=False)
-            if not pivot_mensal.empty:
-                pivot_mensal.to_excel(writer, sheet_name='Por Mês', index=False)
+        abas = {"Por Categoria": pivot_cat, "Por Mês": pivot_mensal}
         st.download_button(
             "📊 Baixar Excel",
-            data=excel_buffer.getvalue(),
+            data=lambda: exportar_excel(manager, filtros, abas),
             file_name=f"relatorio_completo_{empresa_dash}_{ano_dash}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -942,14 +1302,13 @@ def page_dashboard():
 
 def page_comparativo():
     st.subheader("📈 Análise Comparativa")
-    manager = LancamentoManager(DB_PATH)
-    analytics = AnalyticsEngine(manager)
+    manager = get_manager(DB_PATH)
     st.markdown("Compare o desempenho entre diferentes períodos e empresas")
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("**📆 Período 1**")
         ano1 = st.selectbox("Ano 1", range(2020, datetime.now().year + 2), key="ano1")
-        empresas = ["Todas"] + get_empresas_list(manager.read_lancamentos())
+        empresas = ["Todas"] + (manager.list_empresas() or EMPRESAS_PADRAO)
         empresa1 = st.selectbox("Empresa 1", empresas, key="emp1")
     with col2:
         st.markdown("**📆 Período 2**")
@@ -961,10 +1320,8 @@ def page_comparativo():
         filtros1["empresa"] = empresa1
     if empresa2 != "Todas":
         filtros2["empresa"] = empresa2
-    df1 = manager.read_lancamentos(filtros1)
-    df2 = manager.read_lancamentos(filtros2)
-    kpis1 = analytics.calcular_kpis(df1)
-    kpis2 = analytics.calcular_kpis(df2)
+    kpis1 = manager.aggregate_kpis(filtros1)
+    kpis2 = manager.aggregate_kpis(filtros2)
     st.markdown("### 📈 Comparacao de Indicadores")
     col1, col2, col3, col4 = st.columns(4)
     def calc_variation(val1, val2):
@@ -996,26 +1353,17 @@ def page_comparativo():
         var_lanc = calc_variation(kpis1["total_lancamentos"], kpis2["total_lancamentos"])
         st.metric(
             "📊 Lançamentos",
-            f"{kpis2['total_lancamentos']:,}".replace(",", "."),
+            fmt_int(kpis2["total_lancamentos"]),
             f"{fmt_percentage(var_lanc)} vs {ano1}"
         )
-    if not df1.empty and not df2.empty:
+    if kpis1["total_lancamentos"] and kpis2["total_lancamentos"]:
         st.markdown("### 📈 Gráficos Comparativos")
         tab1, tab2 = st.tabs(["📈 Evolução Mensal", "🏢 Por Categoria"])
         with tab1:
-            def prepare_monthly_data(df, year, label):
-                df_temp = df.copy()
-                df_temp["data_dt"] = pd.to_datetime(df_temp["data"], errors="coerce")
-                df_temp = df_temp.dropna(subset=["data_dt"])
-                df_temp["mes"] = df_temp["data_dt"].dt.month
-                df_temp["tipo_norm"] = df_temp["tipo"].str.lower()
-                monthly = df_temp.groupby(["mes", "tipo_norm"])["valor"].sum().unstack(fill_value=0)
-                monthly = monthly.reindex(range(1, 13), fill_value=0)
-                monthly["periodo"] = label
-                monthly["ano"] = year
-                return monthly.reset_index()
-            monthly1 = prepare_monthly_data(df1, ano1, f"{empresa1} {ano1}")
-            monthly2 = prepare_monthly_data(df2, ano2, f"{empresa2} {ano2}")
+            def prepare_monthly_data(filtros, year, label):
+                return _monthly_por_tipo_cached(DB_PATH, _filtros_key(filtros), year, label)
+            monthly1 = prepare_monthly_data(filtros1, ano1, f"{empresa1} {ano1}")
+            monthly2 = prepare_monthly_data(filtros2, ano2, f"{empresa2} {ano2}")
             fig_comp = go.Figure()
             if "entrada" in monthly1.columns:
                 fig_comp.add_trace(go.Scatter(
@@ -1045,20 +1393,20 @@ def page_comparativo():
             )
             st.plotly_chart(fig_comp, use_container_width=True)
         with tab2:
-            cat1 = df1.groupby("categoria")["valor"].sum().sort_values(ascending=False).head(10)
-            cat2 = df2.groupby("categoria")["valor"].sum().sort_values(ascending=False).head(10)
+            cat1 = manager.aggregate_by(("categoria",), filtros1).set_index("categoria")["total"].sort_values(ascending=False).head(10)
+            cat2 = manager.aggregate_by(("categoria",), filtros2).set_index("categoria")["total"].sort_values(ascending=False).head(10)
             fig_cat_comp = go.Figure()
-            categorias_comuns = list(set(cat1.index) & set(cat2.index))
+            categorias_comuns = cat1.index.intersection(cat2.index)
             fig_cat_comp.add_trace(go.Bar(
                 name=f"{ano1}",
                 x=categorias_comuns,
-                y=[cat1.get(cat, 0) for cat in categorias_comuns],
+                y=cat1.reindex(categorias_comuns, fill_value=0).values,
                 marker_color="#1f77b4"
             ))
             fig_cat_comp.add_trace(go.Bar(
                 name=f"{ano2}",
                 x=categorias_comuns,
-                y=[cat2.get(cat, 0) for cat in categorias_comuns],
+                y=cat2.reindex(categorias_comuns, fill_value=0).values,
                 marker_color="#ff7f0e"
             ))
             fig_cat_comp.update_layout(
@@ -1073,11 +1421,11 @@ def page_comparativo():
 
 def page_previsoes():
     st.subheader("🔮 Previsões e Projeções")
-    manager = LancamentoManager(DB_PATH)
+    manager = get_manager(DB_PATH)
     st.markdown("Análise preditiva baseada no histórico de dados")
     col1, col2, col3 = st.columns(3)
     with col1:
-        empresas = ["Todas"] + get_empresas_list(manager.read_lancamentos())
+        empresas = ["Todas"] + (manager.list_empresas() or EMPRESAS_PADRAO)
         empresa_prev = st.selectbox("Empresa", empresas)
     with col2:
         meses_historico = st.selectbox("Meses de Histórico", [6, 12, 24], index=1)
@@ -1087,16 +1435,13 @@ def page_previsoes():
     filtros: Dict[str, str] = {"data_inicio": data_inicio}
     if empresa_prev != "Todas":
         filtros["empresa"] = empresa_prev
-    df_historico = manager.read_lancamentos(filtros)
+    df_historico = manager.read_lancamentos(filtros, columns=ANALISE_COLUMNS)
     if df_historico.empty:
         st.warning("⚠️ Não há dados suficientes para fazer projeções")
         return
-    df_hist = df_historico.copy()
-    df_hist["data_dt"] = pd.to_datetime(df_hist["data"], errors="coerce")
-    df_hist = df_hist.dropna(subset=["data_dt"])
-    df_hist["mes"] = df_hist["data_dt"].dt.to_period("M")
-    df_hist["tipo_norm"] = df_hist["tipo"].str.lower()
-    monthly_hist = df_hist.groupby(["mes", "tipo_norm"])["valor"].sum().unstack(fill_value=0)
+    mes = df_historico["data"].dt.to_period("M").rename("mes")
+    tipo_norm = df_historico["tipo"].cat.rename_categories(str.lower).rename("tipo_norm")
+    monthly_hist = df_historico["valor"].groupby([mes, tipo_norm], observed=True).sum().unstack(fill_value=0)
     if monthly_hist.empty:
         st.warning("⚠️ Não há dados mensais suficientes para projeção")
         return
@@ -1104,35 +1449,21 @@ def page_previsoes():
     saidas_media = monthly_hist.get("saída", pd.Series()).mean()
     # usar numpy.polyfit para ajustar linha
     x = np.arange(len(monthly_hist))
-    def _fit(y: pd.Series) -> Tuple[float, float]:
-        y_arr = y.to_numpy(dtype=float)
-        if len(y_arr) >= 2 and np.any(np.isfinite(y_arr)):
-            slope, intercept = np.polyfit(x, y_arr, 1)
-            return float(slope), float(intercept)
-        return 0.0, float(np.nanmean(y_arr) if len(y_arr) else 0.0)
-    if "entrada" in monthly_hist.columns:
-        slope_ent, intercept_ent = _fit(monthly_hist["entrada"])
+    Y = monthly_hist.reindex(columns=["entrada", "saída"], fill_value=0).to_numpy(dtype=float)
+    if len(x) >= 2:
+        (slope_ent, slope_sai), (intercept_ent, intercept_sai) = np.polyfit(x, Y, 1)
     else:
-        slope_ent, intercept_ent = 0.0, 0.0
-    if "saída" in monthly_hist.columns:
-        slope_sai, intercept_sai = _fit(monthly_hist["saída"])
-    else:
-        slope_sai, intercept_sai = 0.0, 0.0
-    projecoes: List[Dict[str, float]] = []
-    last_month = monthly_hist.index.max()
-    for i in range(1, meses_projecao + 1):
-        next_month = last_month + i
-        ent_proj = intercept_ent + slope_ent * (len(monthly_hist) + i - 1)
-        sai_proj = intercept_sai + slope_sai * (len(monthly_hist) + i - 1)
-        ent_proj = max(0, ent_proj)
-        sai_proj = max(0, sai_proj)
-        projecoes.append({
-            "mes": next_month,
-            "entradas_proj": ent_proj,
-            "saidas_proj": sai_proj,
-            "saldo_proj": ent_proj - sai_proj
-        })
-    df_proj = pd.DataFrame(projecoes)
+        slope_ent = slope_sai = 0.0
+        intercept_ent, intercept_sai = Y.mean(axis=0)
+    offsets = len(monthly_hist) + np.arange(meses_projecao)
+    ent_proj = np.maximum(0, intercept_ent + slope_ent * offsets)
+    sai_proj = np.maximum(0, intercept_sai + slope_sai * offsets)
+    df_proj = pd.DataFrame({
+        "mes": pd.period_range(monthly_hist.index.max() + 1, periods=meses_projecao, freq="M"),
+        "entradas_proj": ent_proj,
+        "saidas_proj": sai_proj,
+        "saldo_proj": ent_proj - sai_proj
+    })
     st.markdown("### 📈 Projeções Calculadas")
     col1, col2, col3, col4 = st.columns(4)
     total_ent_proj = df_proj["entradas_proj"].sum()
@@ -1190,14 +1521,16 @@ def page_previsoes():
     )
     st.plotly_chart(fig_prev, use_container_width=True)
     st.markdown("### 📃 Tabela de Projeções Detalhada")
-    df_proj_display = df_proj.copy()
-    df_proj_display["Período"] = df_proj_display["mes"].astype(str)
-    df_proj_display["Entradas"] = df_proj_display["entradas_proj"].apply(fmt_currency)
-    df_proj_display["Saídas"] = df_proj_display["saidas_proj"].apply(fmt_currency)
-    df_proj_display["Saldo"] = df_proj_display["saldo_proj"].apply(fmt_currency)
-    df_proj_display["Saldo Acumulado"] = df_proj_display["saldo_proj"].cumsum().apply(fmt_currency)
+    colunas_proj = {"Entradas": ent_proj, "Saídas": sai_proj, "Saldo": ent_proj - sai_proj}
+    colunas_proj["Saldo Acumulado"] = np.cumsum(colunas_proj["Saldo"])
+    valores_proj = np.column_stack(list(colunas_proj.values()))
+    df_proj_display = pd.DataFrame(
+        fmt_currency_series(pd.Series(valores_proj.ravel())).to_numpy().reshape(valores_proj.shape),
+        columns=list(colunas_proj)
+    )
+    df_proj_display.insert(0, "Período", df_proj["mes"].astype(str))
     st.dataframe(
-        df_proj_display[["Período", "Entradas", "Saídas", "Saldo", "Saldo Acumulado"]],
+        df_proj_display,
         use_container_width=True,
         hide_index=True
     )
@@ -1236,9 +1569,8 @@ def page_previsoes():
             st.info(f"📈 Margem de segurança: {fmt_percentage(margem_seguranca)}")
 
 def seed_database_if_empty():
-    manager = LancamentoManager(DB_PATH)
-    df_existing = manager.read_lancamentos()
-    if not df_existing.empty:
+    manager = get_manager(DB_PATH)
+    if manager.has_any():
         return
     today = date.today()
     start_date = date(today.year - 1, 1, 1)
@@ -1247,13 +1579,14 @@ def seed_database_if_empty():
     categorias_sai_seed = CATEGORIAS_SAIDA[:6]
     import random
     random.seed(42)
+    rows: List[Dict] = []
     current_date = start_date
     while current_date <= today:
         for empresa in empresas_seed:
             for _ in range(random.randint(2, 4)):
                 valor_entrada = random.uniform(800, 3000)
                 categoria = random.choice(categorias_ent_seed)
-                manager.insert_lancamento({
+                rows.append({
                     "data": current_date.isoformat(),
                     "empresa": empresa,
                     "descricao": f"Receita de {categoria.lower()}",
@@ -1265,7 +1598,7 @@ def seed_database_if_empty():
             for _ in range(random.randint(3, 6)):
                 valor_saida = random.uniform(300, 1500)
                 categoria = random.choice(categorias_sai_seed)
-                manager.insert_lancamento({
+                rows.append({
                     "data": current_date.isoformat(),
                     "empresa": empresa,
                     "descricao": f"Pagamento de {categoria.lower()}",
@@ -1278,6 +1611,8 @@ def seed_database_if_empty():
             current_date = date(current_date.year + 1, 1, 1)
         else:
             current_date = date(current_date.year, current_date.month + 1, 1)
+    manager.bulk_insert_lancamentos(rows)
+    manager.analyze()
 
 def main():
     seed_database_if_empty()
@@ -1297,14 +1632,14 @@ def main():
         )
         st.divider()
         with st.expander("ℹ️ Informações do Sistema"):
-            manager = LancamentoManager(DB_PATH)
-            df_total = manager.read_lancamentos()
-            if not df_total.empty:
-                total_registros = len(df_total)
-                empresas_ativas = df_total["empresa"].nunique()
-                data_mais_antiga = df_total["data"].min()
-                data_mais_recente = df_total["data"].max()
-                st.write(f"**📈 Total de registros:** {total_registros:,}".replace(",", "."))
+            manager = get_manager(DB_PATH)
+            resumo = manager.resumo()
+            if resumo["total_registros"]:
+                total_registros = resumo["total_registros"]
+                empresas_ativas = resumo["empresas_ativas"]
+                data_mais_antiga = resumo["data_mais_antiga"]
+                data_mais_recente = resumo["data_mais_recente"]
+                st.write(f"**📈 Total de registros:** {fmt_int(total_registros)}")
                 st.write(f"**🏢 Empresas ativas:** {empresas_ativas}")
                 st.write(f"**📅 Período:** {data_mais_antiga} a {data_mais_recente}")
             else:
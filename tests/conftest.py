@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app  # noqa: E402
+
+
+LANCAMENTOS = [
+    {"data": "2025-01-05", "empresa": "Gestão", "categoria": "Vendas", "tipo": "Entrada", "valor": 1500.10},
+    {"data": "2025-01-20", "empresa": "Gestão", "categoria": "Aluguel", "tipo": "Saída", "valor": 800},
+    {"data": "2025-01-31", "empresa": "Effexus", "categoria": "Vendas", "tipo": "Entrada", "valor": 0.35},
+    {"data": "2025-02-01", "empresa": "Effexus", "categoria": "Salários", "tipo": "Saída", "valor": 1234.56},
+    {"data": "2025-02-14", "empresa": "Indústria", "categoria": "Serviços", "tipo": "Entrada", "valor": 99.99},
+    {"data": "2025-03-10", "empresa": "Gestão", "categoria": "Impostos", "tipo": "Saída", "valor": 321},
+    {"data": "2024-12-31", "empresa": "Indústria", "categoria": "Vendas", "tipo": "Entrada", "valor": 10},
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return app.LancamentoManager(str(tmp_path / "fluxo.db"))
+
+
+@pytest.fixture
+def populado(manager):
+    assert manager.bulk_insert_lancamentos(LANCAMENTOS)
+    return manager
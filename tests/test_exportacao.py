@@ -0,0 +1,44 @@
+from io import BytesIO, StringIO
+
+import pandas as pd
+import pytest
+
+import app
+
+FILTROS = [{}, {"empresa": "Gestão"}, {"data_inicio": "2025-02-01", "data_fim": "2025-12-31"}]
+
+
+@pytest.fixture
+def exportavel(populado):
+    assert populado.insert_lancamento({
+        "data": "2025-02-02", "empresa": "Gestão; Matriz", "descricao": 'Nota "12"',
+        "categoria": None, "tipo": "Entrada", "valor": 0.1 + 0.2, "observacoes": None,
+    })
+    return populado
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_csv_igual_ao_pandas(exportavel, filtros):
+    esperado = StringIO()
+    exportavel._query_lancamentos(filtros).to_csv(esperado, index=False, sep=";")
+    assert app.exportar_csv(exportavel, filtros) == esperado.getvalue()
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_excel_igual_ao_pandas(exportavel, filtros):
+    openpyxl = pytest.importorskip("openpyxl")
+    aba = pd.DataFrame({"categoria": ["Vendas", "Aluguel"], "Entrada": [10.5, 0.0], "Saída": [0.0, 800.0]})
+    esperado = BytesIO()
+    with pd.ExcelWriter(esperado, engine="xlsxwriter") as writer:
+        exportavel._query_lancamentos(filtros).to_excel(writer, sheet_name="Lançamentos", index=False)
+        aba.to_excel(writer, sheet_name="Por Categoria", index=False)
+    gerado = app.exportar_excel(exportavel, filtros, {"Por Categoria": aba, "Por Mês": aba.iloc[:0]})
+
+    def celulas(conteudo):
+        wb = openpyxl.load_workbook(BytesIO(conteudo))
+        return {
+            ws.title: [[(c.value, c.number_format) for c in linha] for linha in ws.iter_rows()]
+            for ws in wb.worksheets
+        }
+
+    assert celulas(gerado) == celulas(esperado.getvalue())
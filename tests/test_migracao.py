@@ -0,0 +1,105 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import app
+
+# Esquema e gravação da versão original do app (data/created_at em texto, valor REAL).
+SCHEMA_ORIGINAL = [
+    """
+    CREATE TABLE lancamentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TEXT NOT NULL,
+        empresa TEXT NOT NULL,
+        descricao TEXT,
+        categoria TEXT,
+        tipo TEXT NOT NULL,
+        valor REAL NOT NULL,
+        observacoes TEXT,
+        created_at TEXT,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE metas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        empresa TEXT NOT NULL,
+        mes TEXT NOT NULL,
+        meta_entrada REAL DEFAULT 0,
+        meta_saida REAL DEFAULT 0,
+        created_at TEXT
+    )
+    """,
+    "CREATE INDEX idx_lanc_data ON lancamentos(data)",
+    "CREATE INDEX idx_lanc_empresa ON lancamentos(empresa)",
+    "CREATE INDEX idx_lanc_tipo ON lancamentos(tipo)",
+    "CREATE INDEX idx_metas_empresa_mes ON metas(empresa, mes)",
+]
+CRIADO_EM = "2025-03-04T10:15:30"
+LINHAS_ORIGINAIS = [
+    ("2025-03-04", "Gestão", "Venda", "Vendas", "Entrada", 1500.1, "", CRIADO_EM, CRIADO_EM),
+    ("2025-03-31", "Gestão", "Aluguel", None, "Saída", 0.1 + 0.2, None, CRIADO_EM, None),
+    ("1969-12-31", "Effexus", "Antigo", "Impostos", " saída", 3.25, "", None, None),
+    ("2024-02-29", "Effexus", "Bissexto", "Vendas", "Entrada", 7, "", CRIADO_EM, CRIADO_EM),
+]
+
+
+@pytest.fixture
+def banco_original(tmp_path):
+    caminho = str(tmp_path / "original.db")
+    conn = sqlite3.connect(caminho)
+    for sql in SCHEMA_ORIGINAL:
+        conn.execute(sql)
+    conn.executemany(
+        "INSERT INTO lancamentos (data, empresa, descricao, categoria, tipo, valor, observacoes, created_at, updated_at)"
+        " VALUES (?,?,?,?,?,?,?,?,?)",
+        LINHAS_ORIGINAIS,
+    )
+    conn.commit()
+    conn.close()
+    return caminho
+
+
+def test_migra_colunas_para_inteiro(banco_original):
+    manager = app.LancamentoManager(banco_original)
+    with manager._lock:
+        tipos = {row[1]: row[2] for row in manager.conn.execute("PRAGMA table_info(lancamentos)")}
+        indices = {row[0] for row in manager.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert all(tipos[col] == "INTEGER" for col in ("data", "valor", "created_at", "updated_at"))
+    assert {"idx_lanc_data", "idx_lanc_empresa", "idx_lanc_tipo"}.isdisjoint(indices)
+    assert {"idx_lanc_emp_data_tipo", "idx_lanc_data_tipo", "idx_metas_empresa_mes"} <= indices
+
+
+def test_migracao_preserva_valores(banco_original):
+    manager = app.LancamentoManager(banco_original)
+    df = manager._query_lancamentos().sort_values("id").reset_index(drop=True)
+    assert list(df["data"]) == [pd.Timestamp(linha[0]) for linha in LINHAS_ORIGINAIS]
+    assert list(df["valor"]) == [round(linha[5], 2) for linha in LINHAS_ORIGINAIS]
+    assert list(df["tipo"]) == ["Entrada", "Saída", "Saída", "Entrada"]
+    assert list(df["categoria"]) == ["Vendas", "", "Impostos", "Vendas"]
+    criado = pd.Timestamp(datetime.fromisoformat(CRIADO_EM))
+    assert list(df["created_at"].fillna(pd.NaT)) == [criado, criado, pd.NaT, criado]
+    assert df["updated_at"].isna().tolist() == [False, True, True, False]
+
+
+def test_migracao_alimenta_resumo_e_snapshot(banco_original):
+    manager = app.LancamentoManager(banco_original)
+    assert manager._query_kpis({}) == pytest.approx(
+        {"entradas": 1507.1, "saidas": 3.55, "saldo": 1503.55, "total_lancamentos": 4}
+    )
+    snapshot = manager._ler_snapshot({}, app.ANALISE_COLUMNS)
+    sql = manager._query_lancamentos({}, limit=10**9, columns=tuple(app.ANALISE_COLUMNS))
+    pd.testing.assert_frame_equal(snapshot.reset_index(drop=True), sql.reset_index(drop=True), check_categorical=False)
+
+
+def test_reabrir_banco_migrado_nao_altera_nada(banco_original):
+    primeiro = app.LancamentoManager(banco_original)
+    with primeiro._lock:
+        linhas = primeiro.conn.execute("SELECT * FROM lancamentos ORDER BY id").fetchall()
+        versao = primeiro.conn.execute(primeiro.VERSAO_SQL).fetchone()
+    segundo = app.LancamentoManager(banco_original)
+    with segundo._lock:
+        assert segundo.conn.execute("SELECT * FROM lancamentos ORDER BY id").fetchall() == linhas
+        assert segundo.conn.execute(segundo.VERSAO_SQL).fetchone() == versao
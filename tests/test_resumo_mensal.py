@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+import app
+
+MESES_INTEIROS = [
+    {},
+    {"data_inicio": "2025-01-01", "data_fim": "2025-12-31"},
+    {"data_inicio": "2025-02-01", "data_fim": "2025-02-28"},
+    {"empresa": "Gestão"},
+    {"tipo": "Entrada", "data_inicio": "2025-01-01"},
+]
+AGRUPAMENTOS = [("empresa",), ("categoria",), ("categoria", "tipo"), ("mes", "tipo"), ("empresa", "categoria", "tipo")]
+
+
+def _ler_de_lancamentos(monkeypatch):
+    """Força as consultas agregadas a lerem lancamentos em vez de lanc_monthly."""
+    monkeypatch.setattr(app.LancamentoManager, "_origem", staticmethod(lambda filtros=None: ("lancamentos", "COUNT(*)")))
+
+
+@pytest.fixture
+def sem_resumo(monkeypatch):
+    _ler_de_lancamentos(monkeypatch)
+
+
+@pytest.fixture
+def com_sem_categoria(populado):
+    assert populado.insert_lancamento(
+        {"data": "2025-02-03", "empresa": "Gestão", "categoria": None, "tipo": "Saída", "valor": 42}
+    )
+    assert populado.insert_lancamento(
+        {"data": "2025-02-04", "empresa": "Gestão", "categoria": "", "tipo": "Saída", "valor": 8}
+    )
+    return populado
+
+
+def _resumo(manager):
+    with manager._lock:
+        return sorted(manager.conn.execute("SELECT * FROM lanc_monthly").fetchall())
+
+
+def _resumo_recalculado(manager):
+    inicio_mes = manager.INICIO_MES_SQL.format(col="data")
+    with manager._lock:
+        return sorted(manager.conn.execute(
+            f"SELECT {inicio_mes}, empresa, COALESCE(categoria, ''), tipo, SUM(valor), COUNT(*)"
+            " FROM lancamentos GROUP BY 1, 2, 3, 4"
+        ).fetchall())
+
+
+def _consultas(manager, filtros, grupos):
+    return (
+        manager._query_kpis(filtros),
+        manager._query_count(filtros),
+        manager._query_monthly_totals(filtros),
+        manager._query_aggregate_by(grupos, filtros),
+    )
+
+
+@pytest.mark.parametrize("grupos", AGRUPAMENTOS)
+@pytest.mark.parametrize("filtros", MESES_INTEIROS)
+def test_resumo_igual_a_lancamentos(com_sem_categoria, monkeypatch, filtros, grupos):
+    assert app.LancamentoManager._origem(filtros)[0] == "lanc_monthly"
+    kpis, count, mensal, agregado = _consultas(com_sem_categoria, filtros, grupos)
+    _ler_de_lancamentos(monkeypatch)
+    kpis_sql, count_sql, mensal_sql, agregado_sql = _consultas(com_sem_categoria, filtros, grupos)
+    assert kpis == pytest.approx(kpis_sql)
+    assert count == count_sql
+    pd.testing.assert_frame_equal(mensal, mensal_sql)
+    pd.testing.assert_frame_equal(agregado, agregado_sql)
+
+
+def test_categoria_vazia_em_um_grupo(com_sem_categoria, sem_resumo):
+    agregado = com_sem_categoria._query_aggregate_by(("categoria",), {"empresa": "Gestão"})
+    vazia = agregado[agregado["categoria"] == ""]
+    assert len(vazia) == 1 and vazia["n"].iloc[0] == 2 and vazia["total"].iloc[0] == pytest.approx(50)
+    df = com_sem_categoria._query_lancamentos({"empresa": "Gestão"}, columns=tuple(app.ANALISE_COLUMNS))
+    assert (df["categoria"] == "").sum() == 2
+
+
+def test_triggers_mantem_resumo(com_sem_categoria):
+    manager = com_sem_categoria
+    assert _resumo(manager) == _resumo_recalculado(manager)
+    assert manager.update_lancamento(1, {
+        "data": "2025-03-15", "empresa": "Effexus", "categoria": None, "tipo": "Saída", "valor": 7,
+    })
+    assert manager.delete_lancamento(2)
+    assert manager.delete_lancamento(8)
+    assert _resumo(manager) == _resumo_recalculado(manager)
+    assert all(n > 0 for *_, n in _resumo(manager))
+
+
+def test_banco_existente_recebe_triggers_atuais(populado):
+    with populado._lock:
+        populado.conn.execute("DROP TRIGGER trg_lanc_monthly_del")
+        populado.conn.execute("CREATE TRIGGER trg_lanc_monthly_del AFTER DELETE ON lancamentos BEGIN SELECT 1; END")
+    reaberto = app.LancamentoManager(populado.db_path)
+    assert reaberto.delete_lancamento(1)
+    assert _resumo(reaberto) == _resumo_recalculado(reaberto)
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+import app
+
+FILTROS = [
+    {},
+    {"data_inicio": "2025-01-01", "data_fim": "2025-12-31"},
+    {"data_inicio": "2025-01-15", "data_fim": "2025-02-10"},
+    {"empresa": "Gestão"},
+    {"tipo": "Saída", "data_inicio": "2025-02-01"},
+    {"empresa": "Nenhuma"},
+]
+
+
+def _sql(manager, filtros):
+    """Mesma leitura pelo SQLite, sem passar pelo snapshot."""
+    df = manager._query_lancamentos(filtros, limit=10**9, columns=tuple(app.ANALISE_COLUMNS))
+    return df.reset_index(drop=True)
+
+
+def _snapshots(manager):
+    pasta = os.path.dirname(manager._snapshot_base)
+    return sorted(nome for nome in os.listdir(pasta) if nome.endswith(".parquet"))
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_snapshot_igual_ao_sqlite(populado, filtros):
+    df = populado._ler_snapshot(filtros, app.ANALISE_COLUMNS)
+    assert df is not None
+    esperado = _sql(populado, filtros)
+    if esperado.empty:
+        assert df.empty
+    else:
+        pd.testing.assert_frame_equal(df.reset_index(drop=True), esperado, check_categorical=False)
+
+
+def test_escrita_regrava_snapshot(populado):
+    antes = _snapshots(populado)
+    assert populado.insert_lancamento(
+        {"data": "2025-04-01", "empresa": "Adriana", "categoria": "Vendas", "tipo": "Entrada", "valor": 5}
+    )
+    depois = _snapshots(populado)
+    assert len(antes) == len(depois) == 1 and antes != depois
+    df = populado._ler_snapshot({}, app.ANALISE_COLUMNS)
+    assert "Adriana" in set(df["empresa"])
+
+
+def test_escrita_de_outro_processo_cai_no_sqlite(populado):
+    outro = app.LancamentoManager(populado.db_path)
+    with outro._lock:
+        outro.conn.execute(outro.DELETE_SQL, (1,))
+    assert populado._ler_snapshot({}, app.ANALISE_COLUMNS) is None
+    assert len(populado._query_lancamentos({}, columns=tuple(app.ANALISE_COLUMNS))) == len(_sql(populado, {}))
+
+
+def test_banco_recriado_nao_reaproveita_snapshot(tmp_path):
+    caminho = str(tmp_path / "x.db")
+    antigo = app.LancamentoManager(caminho)
+    antigo.bulk_insert_lancamentos([{"data": "2025-01-01", "empresa": "OLD", "valor": 1}] * 3)
+    antigo.conn.close()
+    os.remove(caminho)
+    novo = app.LancamentoManager(caminho)
+    novo.bulk_insert_lancamentos([{"data": "2025-01-01", "empresa": "NEW", "valor": 1}] * 3)
+    df = novo._query_lancamentos({}, columns=tuple(app.ANALISE_COLUMNS))
+    assert list(df["empresa"]) == ["NEW"] * 3
+    assert len(_snapshots(novo)) == 1
+
+
+def test_snapshot_corrompido_cai_no_sqlite(populado):
+    with populado._lock:
+        caminho = populado._caminho_snapshot(*populado.conn.execute(populado.VERSAO_SQL).fetchone())
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(b"nao e parquet")
+    assert populado._ler_snapshot({}, app.ANALISE_COLUMNS) is None
+    assert len(populado._query_lancamentos({}, columns=tuple(app.ANALISE_COLUMNS))) == len(_sql(populado, {}))
+
+
+def test_banco_vazio(manager):
+    df = manager._query_lancamentos({"data_inicio": "2025-01-01"}, columns=tuple(app.ANALISE_COLUMNS))
+    assert df.empty and list(df.columns) == app.ANALISE_COLUMNS
@@ -0,0 +1,33 @@
+import app
+
+VARIACOES = [" entrada", "ENTRADA ", "Saída", "saída", " SAÍDA "]
+
+
+def test_normalizar_tipo():
+    assert [app.normalizar_tipo(tipo) for tipo in VARIACOES] == ["Entrada", "Entrada", "Saída", "Saída", "Saída"]
+    assert app.normalizar_tipo("Transferência") == "Transferência"
+
+
+def test_escrita_grava_tipo_canonico(manager):
+    assert manager.bulk_insert_lancamentos(
+        [{"data": "2025-01-10", "empresa": "Gestão", "tipo": tipo, "valor": 10} for tipo in VARIACOES]
+    )
+    assert manager.update_lancamento(1, {"data": "2025-01-10", "empresa": "Gestão", "tipo": "saÍda ", "valor": 10})
+    with manager._lock:
+        assert {row[0] for row in manager.conn.execute("SELECT DISTINCT tipo FROM lancamentos")} == {"Saída", "Entrada"}
+
+
+def test_banco_antigo_tem_tipos_normalizados(manager):
+    with manager._lock:
+        manager.conn.executemany(
+            "INSERT INTO lancamentos (data, empresa, categoria, tipo, valor) VALUES (20100, 'Gestão', 'Vendas', ?, 1000)",
+            [(tipo,) for tipo in VARIACOES],
+        )
+    reaberto = app.LancamentoManager(manager.db_path)
+    kpis = reaberto._query_kpis({})
+    df = reaberto._query_lancamentos({}, columns=tuple(app.ANALISE_COLUMNS))
+    assert df["tipo"].notna().all()
+    assert df.loc[df["tipo"] == "Entrada", "valor"].sum() == kpis["entradas"] == 20
+    assert df.loc[df["tipo"] == "Saída", "valor"].sum() == kpis["saidas"] == 30
+    agregado = reaberto._query_aggregate_by(("tipo",), {})
+    assert list(agregado["tipo"]) == ["Entrada", "Saída"] and list(agregado["n"]) == [2, 3]